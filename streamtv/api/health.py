@@ -5,6 +5,7 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from pathlib import Path
 import logging
+import os
 import subprocess
 import platform
 import socket
@@ -12,6 +13,7 @@ import httpx
 import asyncio
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
+from collections import Counter
 import re
 
 from ..database import get_db, Channel, MediaItem
@@ -21,6 +23,26 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["Health"])
 
+# Log error categories, checked in order (first match wins)
+ERROR_CATEGORIES = {
+    "youtube_rate_limit": r"rate.?limit",
+    "network_error": r"nodename nor servname|Failed to resolve hostname|Connection.*refused",
+    "ffmpeg_error": r"FFmpeg.*error|FFmpeg.*failed|Error opening input",
+    "database_error": r"database.*error|sql.*error|database.*locked",
+    "authentication_error": r"401.*Unauthorized|authentication.*failed|Invalid.*token"
+}
+
+# All categories compiled into one pattern so each line is classified by a
+# single regex call. Each alternative is a lookahead from the start of the
+# line, which keeps the "first category wins" order of ERROR_CATEGORIES;
+# the matched category is reported by `match.lastgroup`.
+_ERROR_CLASSIFIER = re.compile(
+    "|".join(f"(?=.*?(?P<{name}>{pattern}))" for name, pattern in ERROR_CATEGORIES.items()),
+    re.IGNORECASE
+)
+_ERROR_WORD = re.compile(r"error", re.IGNORECASE)
+_WARNING_WORD = re.compile(r"warning", re.IGNORECASE)
+
 
 def check_ffmpeg() -> Dict[str, Any]:
     """Check FFmpeg installation and version"""
@@ -93,37 +115,48 @@ def check_database(db: Session) -> Dict[str, Any]:
 def check_ports() -> Dict[str, Any]:
     """Check if required ports are available"""
     checks = {}
-    ports_to_check = {
-        "http": config.server.port,
-        "ssdp": 1900 if config.hdhomerun.enabled and config.hdhomerun.enable_ssdp else None
+    
+    # The HTTP port is the one serving this health request, so it is
+    # listening by definition; no need to open a connection to ourselves.
+    http_port = config.server.port
+    checks["http"] = {
+        "status": "healthy",
+        "port": http_port,
+        "listening": True,
+        "message": f"Port {http_port} is listening (serving this request)"
     }
     
-    for name, port in ports_to_check.items():
-        if port is None:
-            continue
-            
+    if config.hdhomerun.enabled and config.hdhomerun.enable_ssdp:
+        port = 1900
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(1)
-            result = sock.connect_ex(('localhost', port))
-            sock.close()
+            # SSDP is UDP: probe by trying to bind the port. The SSDP server
+            # binds with SO_REUSEADDR/SO_REUSEPORT, so the probe must not set
+            # them or the bind would succeed even while the server is up.
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            try:
+                sock.bind(('', port))
+                listening = False
+            except OSError:
+                listening = True
+            finally:
+                sock.close()
             
-            if result == 0:
-                checks[name] = {
+            if listening:
+                checks["ssdp"] = {
                     "status": "healthy",
                     "port": port,
                     "listening": True,
                     "message": f"Port {port} is listening"
                 }
             else:
-                checks[name] = {
+                checks["ssdp"] = {
                     "status": "warning",
                     "port": port,
                     "listening": False,
-                    "message": f"Port {port} is not accessible"
+                    "message": f"Port {port} is not bound (SSDP server not running)"
                 }
         except Exception as e:
-            checks[name] = {
+            checks["ssdp"] = {
                 "status": "error",
                 "port": port,
                 "message": f"Error checking port {port}: {str(e)}"
@@ -176,6 +209,16 @@ def check_network_connectivity() -> Dict[str, Any]:
     return checks
 
 
+def _classify_log_lines(lines: List[str]):
+    """Yield (kind, error_type, message) for each error or warning log line"""
+    for line in lines:
+        if _ERROR_WORD.search(line):
+            match = _ERROR_CLASSIFIER.match(line)
+            yield "error", match.lastgroup if match else "unknown", line.strip()[:150]
+        elif _WARNING_WORD.search(line):
+            yield "warning", None, line.strip()[:150]
+
+
 def analyze_log_errors(log_file: Path, hours: int = 24) -> Dict[str, Any]:
     """Analyze log file for errors and patterns (optimized for speed)"""
     if not log_file.exists():
@@ -187,16 +230,6 @@ def analyze_log_errors(log_file: Path, hours: int = 24) -> Dict[str, Any]:
         }
     
     try:
-        errors = []
-        warnings = []
-        error_patterns = {
-            "youtube_rate_limit": r"rate.?limit",
-            "network_error": r"nodename nor servname|Failed to resolve hostname|Connection.*refused",
-            "ffmpeg_error": r"FFmpeg.*error|FFmpeg.*failed|Error opening input",
-            "database_error": r"database.*error|sql.*error|database.*locked",
-            "authentication_error": r"401.*Unauthorized|authentication.*failed|Invalid.*token"
-        }
-        
         # Read last 500 lines only (faster) - use tail-like approach
         try:
             # Try to read from end of file (more efficient for large files)
@@ -218,32 +251,15 @@ def analyze_log_errors(log_file: Path, hours: int = 24) -> Dict[str, Any]:
                 lines = f.readlines()
                 recent_lines = lines[-500:] if len(lines) > 500 else lines
         
-        for line in recent_lines:
-            if not line.strip():
-                continue
-            line_lower = line.lower()
-            if 'error' in line_lower:
-                # Categorize error
-                error_type = "unknown"
-                for pattern_name, pattern in error_patterns.items():
-                    if re.search(pattern, line_lower, re.IGNORECASE):
-                        error_type = pattern_name
-                        break
-                
-                errors.append({
-                    "type": error_type,
-                    "message": line.strip()[:150],  # Truncate long lines
-                })
-            elif 'warning' in line_lower and len(warnings) < 20:  # Limit warnings
-                warnings.append({
-                    "message": line.strip()[:150],
-                })
+        # Single classification pass; messages are truncated to 150 chars
+        classified = list(_classify_log_lines(recent_lines))
+        errors = [{"type": error_type, "message": message}
+                  for kind, error_type, message in classified if kind == "error"]
+        warnings = [{"message": message}
+                    for kind, _, message in classified if kind == "warning"][:20]  # Limit warnings
         
         # Count by type
-        error_counts = {}
-        for error in errors:
-            error_type = error["type"]
-            error_counts[error_type] = error_counts.get(error_type, 0) + 1
+        error_counts = dict(Counter(error["type"] for error in errors))
         
         # Get most recent errors (last 5 only)
         recent_errors = errors[-5:] if len(errors) > 5 else errors
@@ -315,39 +331,44 @@ def check_channels(db: Session) -> Dict[str, Any]:
 def check_streaming_processes() -> Dict[str, Any]:
     """Check if FFmpeg streaming processes are running"""
     try:
-        if platform.system() == "Darwin":  # macOS
+        if platform.system() == "Windows":
             result = subprocess.run(
-                ["ps", "aux"],
+                ["tasklist"],
                 capture_output=True,
                 text=True,
                 timeout=5
             )
-            ffmpeg_count = result.stdout.count("ffmpeg")
-            streamtv_count = result.stdout.count("streamtv")
-            
-            return {
-                "status": "healthy",
-                "ffmpeg_processes": ffmpeg_count,
-                "streamtv_processes": streamtv_count,
-                "message": f"Found {ffmpeg_count} FFmpeg processes and {streamtv_count} StreamTV processes"
-            }
+            output = result.stdout.lower()
+            ffmpeg_count = output.count("ffmpeg")
+            streamtv_count = output.count("streamtv")
         else:
-            # Linux/Windows
+            # macOS/Linux: one argument line per process instead of the full
+            # `ps aux` table. The server itself runs as python/uvicorn, so it is
+            # recognised by "streamtv" in its arguments, not its command name.
             result = subprocess.run(
-                ["ps", "aux"] if platform.system() != "Windows" else ["tasklist"],
+                ["ps", "-eo", "args="],
                 capture_output=True,
                 text=True,
                 timeout=5
             )
-            ffmpeg_count = result.stdout.lower().count("ffmpeg")
-            streamtv_count = result.stdout.lower().count("streamtv")
-            
-            return {
-                "status": "healthy",
-                "ffmpeg_processes": ffmpeg_count,
-                "streamtv_processes": streamtv_count,
-                "message": f"Found {ffmpeg_count} FFmpeg processes and {streamtv_count} StreamTV processes"
-            }
+            ffmpeg_count = 0
+            streamtv_count = 0
+            for line in result.stdout.splitlines():
+                args = line.strip()
+                if not args:
+                    continue
+                # macOS reports the full executable path
+                if os.path.basename(args.split(None, 1)[0]).lower() == "ffmpeg":
+                    ffmpeg_count += 1
+                elif "streamtv" in args.lower():
+                    streamtv_count += 1
+        
+        return {
+            "status": "healthy",
+            "ffmpeg_processes": ffmpeg_count,
+            "streamtv_processes": streamtv_count,
+            "message": f"Found {ffmpeg_count} FFmpeg processes and {streamtv_count} StreamTV processes"
+        }
     except Exception as e:
         return {
             "status": "warning",
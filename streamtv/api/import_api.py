@@ -18,7 +18,7 @@ import os
 logger = logging.getLogger(__name__)
 
 from ..database import get_db
-from ..importers import import_channels_from_yaml
+from ..importers import import_channels_from_yaml, import_channels_from_data
 from ..api.schemas import ChannelResponse
 from ..validation import YAMLValidator, ValidationError
 from ..utils.yaml_to_json import yaml_to_json
@@ -28,6 +28,9 @@ router = APIRouter(prefix="/import", tags=["Import"])
 # Maximum file size: 5 MB
 MAX_FILE_SIZE = 5 * 1024 * 1024
 
+# Prefer the libyaml-backed safe loader when available
+_SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 # Allowed MIME types for YAML files
 ALLOWED_MIME_TYPES = {
     'text/yaml',
@@ -224,13 +227,16 @@ async def import_channels_yaml_path(
             detail="File must be a YAML file (.yaml or .yml)"
         )
     
-    # Enforce size limit (5 MB) for path-based imports
-    if yaml_path.stat().st_size > 5 * 1024 * 1024:
+    # Enforce size limit (5 MB) while reading; the file is read and parsed once
+    # and the parsed data is passed to the validator and importer.
+    with open(yaml_path, 'rb') as f:
+        raw = f.read(MAX_FILE_SIZE + 1)
+    if len(raw) > MAX_FILE_SIZE:
         raise HTTPException(status_code=400, detail="YAML file too large (max 5 MB)")
 
-    # Basic YAML safety check to reject non-safe tags
+    # Safe loader rejects non-safe tags
     try:
-        yaml.safe_load(yaml_path.read_text())
+        data = yaml.load(raw, Loader=_SafeLoader)
     except yaml.YAMLError as e:
         raise HTTPException(status_code=400, detail=f"Invalid YAML: {e}")
 
@@ -239,7 +245,7 @@ async def import_channels_yaml_path(
         if validate:
             try:
                 validator = YAMLValidator()
-                result = validator.validate_channel_file(yaml_path)
+                result = validator.validate_channel_yaml_data(data, yaml_path.name)
                 if not result.get('valid', False):
                     raise HTTPException(
                         status_code=400,
@@ -251,8 +257,11 @@ async def import_channels_yaml_path(
                     detail=f"Validation error: {e.message}"
                 )
         
-        # Import channels
-        channels = await import_channels_from_yaml(yaml_path, validate=validate)
+        if not isinstance(data, dict):
+            raise HTTPException(status_code=400, detail="YAML file must contain a 'channels' list")
+        
+        # Import channels (already validated above)
+        channels = await import_channels_from_data(data, yaml_path.name)
         
         return channels
     except HTTPException:
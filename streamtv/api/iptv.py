@@ -3,18 +3,29 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from datetime import datetime, timedelta, time as dt_time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import json
+import re
 import urllib.parse
+from pathlib import Path
+import calendar
+import copy
+import functools
+import time
+import bisect
+import itertools
 import httpx
 import logging
-from xml.sax.saxutils import escape as xml_escape
+from collections import defaultdict
 
-from ..database import get_db, Channel, Playlist, PlaylistItem, MediaItem, Schedule
+from ..database import get_db, Channel, Playlist, PlaylistItem, MediaItem, Schedule, ChannelPlaybackPosition
+from ..database.models import PlayoutMode, StreamingMode
 from ..streaming import StreamManager, StreamSource
 from ..streaming.plex_api_client import PlexAPIClient
 from ..config import config
-from ..scheduling import ScheduleParser, ScheduleEngine
+from ..scheduling import ScheduleParser, ScheduleEngine, ParsedSchedule
 
 logger = logging.getLogger(__name__)
 
@@ -22,29 +33,453 @@ router = APIRouter(tags=["IPTV"])
 
 stream_manager = StreamManager()
 
+# Enum lookup tables for coercing raw playout/streaming mode strings
+_PLAYOUT_BY_VALUE = {m.value.lower(): m for m in PlayoutMode}
+_PLAYOUT_BY_NAME = {m.name: m for m in PlayoutMode}
+_STREAMING_BY_VALUE = {m.value.lower(): m for m in StreamingMode}
+_STREAMING_BY_NAME = {m.name: m for m in StreamingMode}
+
+# Short-lived caches of generated M3U/XMLTV bodies: key -> (generated at, encoded body)
+_EPG_CACHE_TTL = 60  # seconds
+_M3U_CACHE_TTL = 300  # seconds
+_HLS_CACHE_TTL = 300  # seconds
+# Keys include client-supplied values (Host header, access token), so each cache is capped
+_EPG_CACHE_MAX = 8
+_M3U_CACHE_MAX = 32
+_HLS_CACHE_MAX = 256
+_EPG_CACHE: Dict[tuple, Tuple[float, bytes]] = {}
+_M3U_CACHE: Dict[tuple, Tuple[float, bytes]] = {}
+_HLS_CACHE: Dict[tuple, Tuple[float, bytes]] = {}
+
+# Rendered per-item HLS playlist lines: (media item id, updated_at, title) -> (lines, is HLS source)
+_HLS_ITEM_CACHE: Dict[tuple, Tuple[str, bool]] = {}
+_HLS_ITEM_CACHE_MAX = 4096
+
+# Upstream HEAD/range probe results for /iptv/stream:
+# stream URL -> (probed at, (content length, content type, final URL))
+_PROBE_CACHE_TTL = 60  # seconds
+_PROBE_CACHE_MAX = 1024
+_PROBE_CACHE: Dict[str, Tuple[float, Tuple[Optional[str], str, str]]] = {}
+# Probes currently running, so concurrent first hits on a URL share one upstream round trip
+_PROBE_INFLIGHT: Dict[str, "asyncio.Future[Tuple[Optional[str], str, str]]"] = {}
+# Pooled client shared by all probes; created on first use, closed on shutdown
+_probe_client: Optional[httpx.AsyncClient] = None
+
+# M3U8 attribute text must stay on one line; EXTINF descriptions also escape commas
+_M3U8_LINE_TRANS = str.maketrans({'\n': ' ', '\r': ' '})
+_M3U8_DESC_TRANS = str.maketrans({'\n': ' ', '\r': ' ', ',': '\\,'})
+
+
+# Episode-info patterns applied to every EPG programme title/description
+_SE_RE = re.compile(r'[Ss](\d+)[Ee](\d+)')
+_SE_SUFFIX_RE = re.compile(r'\s+[Ss]\d+[Ee]\d+$')
+_AIRDATE_RE = re.compile(r'Original air date:\s*([A-Za-z]+\s+\d+,\s+\d{4})')
+
+# Escape table for XML text/attribute values (single C-level pass via str.translate)
+_XML_TRANS = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&apos;'})
+
+
+# Constant XMLTV fragments, already escaped
+_GENERAL_CATEGORY_XML = '    <category lang="en">General</category>\n'
+_LIVE_CATEGORY_XML = '    <category lang="en">Live</category>\n'
+
 
 def _xml(value) -> str:
     """Safely escape XML text/attribute values."""
     if value is None:
         return ""
-    return xml_escape(str(value), {'"': '&quot;', "'": '&apos;'})
+    return (value if type(value) is str else str(value)).translate(_XML_TRANS)
+
+
+def _coerce_playout(value: str) -> PlayoutMode:
+    """Map a stored playout_mode string to PlayoutMode (by value, then name), defaulting to CONTINUOUS."""
+    normalized = value.lower().replace('-', '_')
+    mode = _PLAYOUT_BY_VALUE.get(normalized) or _PLAYOUT_BY_NAME.get(normalized.upper())
+    if mode is None:
+        logger.warning(f"Invalid playout_mode '{value}', defaulting to CONTINUOUS")
+        return PlayoutMode.CONTINUOUS
+    return mode
+
+
+def _coerce_streaming(value: str) -> StreamingMode:
+    """Map a stored streaming_mode string to StreamingMode, defaulting to TRANSPORT_STREAM_HYBRID."""
+    normalized = value.lower().replace('-', '_')
+    mode = _STREAMING_BY_VALUE.get(normalized) or _STREAMING_BY_NAME.get(normalized.upper())
+    if mode is None:
+        logger.warning(f"Invalid streaming_mode '{value}', defaulting to TRANSPORT_STREAM_HYBRID")
+        return StreamingMode.TRANSPORT_STREAM_HYBRID
+    return mode
+
+
+def _normalize_channel_enums(channel) -> None:
+    """Coerce string playout_mode/streaming_mode values on a channel to their enums in place."""
+    playout_mode = channel.playout_mode
+    streaming_mode = channel.streaming_mode
+    # Both enums subclass str, so test for the enum types; loaded channels are already converted
+    if isinstance(playout_mode, PlayoutMode) and isinstance(streaming_mode, StreamingMode):
+        return
+    if isinstance(playout_mode, str) and not isinstance(playout_mode, PlayoutMode):
+        channel.playout_mode = _coerce_playout(playout_mode)
+    if isinstance(streaming_mode, str) and not isinstance(streaming_mode, StreamingMode):
+        channel.streaming_mode = _coerce_streaming(streaming_mode)
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_schedule_cached(path_str: str, mtime_ns: int) -> ParsedSchedule:
+    """Parse a schedule file once per (path, mtime); editing the file invalidates the entry."""
+    path = Path(path_str)
+    return ScheduleParser.parse_file(path, path.parent)
+
+
+def _parsed_schedule(schedule_file: Path) -> ParsedSchedule:
+    """Return the parsed schedule for schedule_file, reusing the cached parse when unchanged."""
+    cached = _parse_schedule_cached(str(schedule_file), schedule_file.stat().st_mtime_ns)
+    # ScheduleEngine replaces entries in schedule.sequences (shuffleSequence), so hand
+    # each caller its own sequences mapping rather than the shared cached one
+    schedule = copy.copy(cached)
+    schedule.sequences = dict(cached.sequences)
+    return schedule
+
+
+def _epoch(value: datetime) -> int:
+    """Whole seconds since the epoch for a naive-UTC (or aware) datetime."""
+    return calendar.timegm(value.utctimetuple())
+
+
+def _xmltv_time(ts: int) -> str:
+    """Format epoch seconds as an XMLTV timestamp ("YYYYMMDDhhmmss +0000")."""
+    t = time.gmtime(ts)
+    return f"{t.tm_year:04d}{t.tm_mon:02d}{t.tm_mday:02d}{t.tm_hour:02d}{t.tm_min:02d}{t.tm_sec:02d} +0000"
+
+
+def _url_basename(url: str) -> str:
+    """File name of a URL without its extension (title fallback for untitled media)."""
+    if '%' in url:
+        url = urllib.parse.unquote(url)
+    return url.rstrip('/').rpartition('/')[2].rsplit('.', 1)[0]
+
+
+def _media_meta(media_item: MediaItem, cache: Dict[int, dict]) -> dict:
+    """Parsed meta_data JSON of a media item, memoised in cache ({} if missing or invalid)."""
+    meta = cache.get(media_item.id)
+    if meta is None:
+        meta = {}
+        if media_item.meta_data:
+            try:
+                parsed = json.loads(media_item.meta_data)
+            except ValueError:
+                parsed = None
+            if isinstance(parsed, dict):
+                meta = parsed
+        cache[media_item.id] = meta
+    return meta
+
+
+def _cache_get(cache: Dict[tuple, Tuple[float, bytes]], key: tuple, ttl: float) -> Optional[Tuple[float, bytes]]:
+    """Return the cached (generated at, body) entry for key if it is younger than ttl."""
+    entry = cache.get(key)
+    if entry and time.time() - entry[0] < ttl:
+        return entry
+    return None
+
+
+def _cache_put(cache: Dict[tuple, Tuple[float, bytes]], key: tuple, entry: Tuple[float, bytes],
+               ttl: float, max_entries: Optional[int] = None) -> None:
+    """Store entry under key, first dropping expired entries and then the oldest ones beyond max_entries."""
+    now = time.time()
+    # Snapshot the keys: request threads may insert concurrently
+    for stale_key in [k for k, (generated_at, _) in list(cache.items()) if now - generated_at >= ttl]:
+        cache.pop(stale_key, None)
+    # Re-insert so dict order stays oldest-first
+    cache.pop(key, None)
+    if max_entries is not None:
+        while len(cache) >= max_entries:
+            cache.pop(next(iter(cache)), None)
+    cache[key] = entry
 
 
-def _resolve_logo_url(channel, base_url: str) -> Optional[str]:
+def _cache_stream(cache: Dict[tuple, Tuple[float, bytes]], key: tuple, chunks: Iterable[str],
+                  ttl: float, max_entries: Optional[int] = None,
+                  started: Optional[float] = None) -> Iterator[bytes]:
+    """Encode each chunk once, pass it to the client and cache the full body once generation completes."""
+    if started is None:
+        started = time.time()
+    parts = []
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        parts.append(data)
+        yield data
+    _cache_put(cache, key, (started, b"".join(parts)), ttl, max_entries)
+
+
+def _resolve_logo_url(channel, base_url: str, icon_prefix: Optional[str] = None) -> Optional[str]:
     """
     Build an absolute logo URL for M3U/XMLTV.
     - Uses channel.logo_path if provided.
     - Falls back to /static/channel_icons/channel_<number>.png.
+    Callers looping over channels can pass a precomputed icon_prefix
+    ("<base_url>/static/channel_icons/channel_").
     """
     logo_path = channel.logo_path
-    if logo_path:
-        if logo_path.startswith('http'):
-            return logo_path
-        if logo_path.startswith('/'):
-            return f"{base_url}{logo_path}"
-        return f"{base_url}/{logo_path}"
-    # Default fallback based on channel number icon
-    return f"{base_url}/static/channel_icons/channel_{channel.number}.png"
+    if not logo_path:
+        # Default fallback based on channel number icon (most channels)
+        if icon_prefix is None:
+            icon_prefix = f"{base_url}/static/channel_icons/channel_"
+        return f"{icon_prefix}{channel.number}.png"
+    if logo_path[0] == '/':
+        return f"{base_url}{logo_path}"
+    if logo_path.startswith('http'):
+        return logo_path
+    return f"{base_url}/{logo_path}"
+
+
+def _m3u_stream_ext(mode: str) -> str:
+    """Channel URL extension listed in the M3U for a ?mode= value."""
+    # Only an explicit mode=hls lists the HLS playlists; the default "mixed" playlist
+    # keeps pointing at the continuous MPEG-TS streams
+    return ".m3u8" if mode == "hls" else ".ts"
+
+
+def _iter_m3u(channels, base_url: str, access_token: Optional[str], stream_ext: str) -> Iterator[str]:
+    """Yield the M3U playlist one channel entry at a time (no database access)."""
+    # Loop invariants: only the channel number varies per entry
+    token_param = f"?access_token={access_token}" if access_token else ""
+    stream_prefix = f"{base_url}/iptv/channel/"
+    icon_prefix = f"{base_url}/static/channel_icons/channel_"
+    
+    yield "#EXTM3U\n"
+    
+    for channel in channels:
+        try:
+            # Build the entry separately so a failing channel leaves no partial lines
+            number = channel.number
+            name = channel.name
+            group = channel.group
+            entry = []
+            stream_url = f"{stream_prefix}{number}{stream_ext}{token_param}"
+            logo_url = _resolve_logo_url(channel, base_url, icon_prefix)
+            entry.append(f'#EXTINF:-1 tvg-id="{number}" tvg-name="{name}"')
+            if group:
+                entry.append(f' group-title="{group}"')
+            if logo_url:
+                entry.append(f' tvg-logo="{logo_url}"')
+            entry.append(f',{name}\n')
+            entry.append(f"{stream_url}\n")
+        except Exception as e:
+            logger.error(f"Error processing channel {channel.number if channel else 'unknown'} for M3U: {e}", exc_info=True)
+            # Continue with next channel instead of failing entire request
+            continue
+        yield "".join(entry)
+
+
+def _build_xmltv_channels(channels, base_url: str) -> str:
+    """Build the XMLTV <channel> definitions for all channels (no database access)."""
+    definitions = []
+    icon_prefix = f"{base_url}/static/channel_icons/channel_"
+    # Channel definitions - ensure Plex-compatible format
+    for channel in channels:
+        # Use channel number as ID (Plex expects numeric or alphanumeric IDs)
+        channel_id = _xml(str(channel.number).strip())
+        group = channel.group
+        definitions.append(f'  <channel id="{channel_id}">\n')
+    
+        # Primary display name (required)
+        definitions.append(f'    <display-name>{_xml(channel.name)}</display-name>\n')
+    
+        # Additional display names for grouping
+        if group:
+            definitions.append(f'    <display-name>{_xml(group)}</display-name>\n')
+    
+        # Channel number as display name (Plex compatibility)
+        definitions.append(f'    <display-name>{channel_id}</display-name>\n')
+    
+        # Logo/icon (Plex expects absolute URLs). Fall back to default icon by number.
+        logo_url = _resolve_logo_url(channel, base_url, icon_prefix)
+        if logo_url:
+            definitions.append(f'    <icon src="{_xml(logo_url)}"/>\n')
+    
+        definitions.append('  </channel>\n')
+    return "".join(definitions)
+
+
+def _hls_item_lines(media_item: MediaItem, title: str) -> Tuple[str, bool]:
+    """
+    #EXTINF, #EXT-X-METADATA and #EXT-X-ORIGINAL-URL lines for one HLS entry, and
+    whether the item is itself an HLS stream; memoised per media item version.
+    """
+    key = (media_item.id, media_item.updated_at, title)
+    entry = _HLS_ITEM_CACHE.get(key)
+    if entry is not None:
+        return entry
+    
+    duration = media_item.duration or 1800
+    # Each column is read once; several feed both the EXTINF text and a metadata tag
+    source_value = media_item.source.value if media_item.source else ""
+    uploader = media_item.uploader
+    upload_date = media_item.upload_date
+    view_count = media_item.view_count
+    source_id = media_item.source_id
+    
+    # Build comprehensive metadata string for EXTINF
+    metadata_parts = [title]
+    
+    # Add ALL available metadata
+    if media_item.description:
+        desc = media_item.description[:200].translate(_M3U8_DESC_TRANS)
+        metadata_parts.append(f"Description: {desc}")
+    
+    if uploader:
+        metadata_parts.append(f"Uploader: {uploader}")
+    
+    if upload_date:
+        metadata_parts.append(f"Date: {upload_date}")
+    
+    if view_count:
+        metadata_parts.append(f"Views: {view_count}")
+    
+    if source_id:
+        metadata_parts.append(f"Source ID: {source_id}")
+    
+    if source_value:
+        metadata_parts.append(f"Source: {source_value}")
+    
+    # Parse and add meta_data JSON fields
+    if media_item.meta_data:
+        try:
+            meta = json.loads(media_item.meta_data)
+        except ValueError:
+            meta = None
+        if isinstance(meta, dict):
+            for key_name, value in meta.items():
+                if value and str(value) not in ['None', 'null', '']:
+                    value_str = str(value)[:100].replace(',', '\\,')
+                    metadata_parts.append(f"{key_name}: {value_str}")
+    
+    # Combine all metadata (escape commas for M3U8)
+    full_metadata = " | ".join(metadata_parts).translate(_M3U8_LINE_TRANS)
+    
+    # Add custom metadata tags (some players support these); optional tags are
+    # rendered as empty segments so the whole entry is a single format operation
+    uploader_tag = ""
+    if uploader:
+        escaped_uploader = uploader.replace(',', '\\,')
+        uploader_tag = f"#EXT-X-METADATA:UPLOADER={escaped_uploader}\n"
+    upload_date_tag = f"#EXT-X-METADATA:UPLOAD_DATE={upload_date}\n" if upload_date else ""
+    thumbnail_tag = f"#EXT-X-METADATA:THUMBNAIL={media_item.thumbnail}\n" if media_item.thumbnail else ""
+    view_count_tag = f"#EXT-X-METADATA:VIEW_COUNT={view_count}\n" if view_count else ""
+    source_id_tag = f"#EXT-X-METADATA:SOURCE_ID={source_id}\n" if source_id else ""
+    
+    # Direct HLS URLs are served through the MPEG-TS endpoint; keep the original
+    # URL as a comment for the web player. The routing decision is cached with
+    # the entry so playlist renders never rescan the URL.
+    url = media_item.url
+    is_hls = bool(url) and '.m3u8' in url.lower()
+    original_url_tag = f"#EXT-X-ORIGINAL-URL:{url}\n" if is_hls else ""
+    
+    lines = (
+        f"#EXTINF:{duration:.3f},{full_metadata}\n"
+        f"#EXT-X-METADATA:SOURCE={source_value}\n"
+        f"{uploader_tag}{upload_date_tag}{thumbnail_tag}{view_count_tag}{source_id_tag}{original_url_tag}"
+    )
+    
+    entry = (lines, is_hls)
+    if len(_HLS_ITEM_CACHE) >= _HLS_ITEM_CACHE_MAX:
+        _HLS_ITEM_CACHE.clear()
+    _HLS_ITEM_CACHE[key] = entry
+    return entry
+
+
+def _get_probe_client() -> httpx.AsyncClient:
+    """Return the shared upstream probe client, creating it if needed."""
+    global _probe_client
+    if _probe_client is None or _probe_client.is_closed:
+        _probe_client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    return _probe_client
+
+
+async def close_probe_client() -> None:
+    """Close the shared upstream probe client (application shutdown)."""
+    global _probe_client
+    if _probe_client is not None:
+        await _probe_client.aclose()
+        _probe_client = None
+
+
+async def _probe_stream(stream_url: str) -> Tuple[Optional[str], str, str]:
+    """Content length, content type and final (redirected) URL of an upstream stream, cached for a minute."""
+    entry = _PROBE_CACHE.get(stream_url)
+    if entry and time.time() - entry[0] < _PROBE_CACHE_TTL:
+        return entry[1]
+    
+    pending = _PROBE_INFLIGHT.get(stream_url)
+    if pending is None:
+        pending = asyncio.ensure_future(_probe_upstream(stream_url))
+        _PROBE_INFLIGHT[stream_url] = pending
+        pending.add_done_callback(lambda _: _PROBE_INFLIGHT.pop(stream_url, None))
+    # Shielded so one client disconnecting does not cancel the probe for the others
+    return await asyncio.shield(pending)
+
+
+async def _probe_upstream(stream_url: str) -> Tuple[Optional[str], str, str]:
+    """Probe an upstream stream with HEAD (falling back to a small range GET) and cache a successful result."""
+    probed_at = time.time()
+    final_url = stream_url
+    content_length = None
+    upstream_content_type = "video/mp4"
+    
+    try:
+        client = _get_probe_client()
+        # Try HEAD request first
+        try:
+            # Follow redirects and validate the stream URL
+            head_response = await client.head(final_url, follow_redirects=True, timeout=10.0)
+            
+            # If redirected, use the final URL
+            if head_response.status_code in [301, 302, 303, 307, 308]:
+                redirect_url = head_response.headers.get('Location')
+                if redirect_url:
+                    if redirect_url.startswith('/'):
+                        parsed = urllib.parse.urlparse(final_url)
+                        redirect_url = f"{parsed.scheme}://{parsed.netloc}{redirect_url}"
+                    final_url = redirect_url
+                    logger.info(f"Stream URL redirected to: {final_url}")
+                    # Re-validate the redirected URL
+                    head_response = await client.head(final_url, follow_redirects=True, timeout=10.0)
+            content_length = head_response.headers.get("Content-Length")
+            upstream_content_type = head_response.headers.get("Content-Type", "video/mp4")
+        except (httpx.HTTPError, OSError):
+            pass
+        
+        # If HEAD doesn't work or no Content-Length, try a small range request
+        if not content_length:
+            try:
+                range_headers = {"Range": "bytes=0-1023"}
+                test_response = await client.get(final_url, headers=range_headers, follow_redirects=True, timeout=10.0)
+                content_range = test_response.headers.get("Content-Range")
+                if content_range:
+                    # Extract total from "bytes 0-1023/1234567"
+                    if "/" in content_range:
+                        content_length = content_range.split("/")[-1]
+                if not content_length:
+                    content_length = test_response.headers.get("Content-Length")
+                if not upstream_content_type or upstream_content_type == "application/octet-stream":
+                    upstream_content_type = test_response.headers.get("Content-Type", "video/mp4")
+            except (httpx.HTTPError, OSError):
+                pass
+    except Exception as e:
+        logger.warning(f"Could not determine content length: {e}")
+        # Continue without content length - browser will handle it
+    
+    result = (content_length, upstream_content_type, final_url)
+    # Only cache a usable probe; a transient failure must not hide the length for a minute
+    if content_length:
+        if len(_PROBE_CACHE) >= _PROBE_CACHE_MAX:
+            _PROBE_CACHE.clear()
+        _PROBE_CACHE[stream_url] = (probed_at, result)
+    return result
 
 
 @router.get("/iptv/channels.m3u")
@@ -65,36 +500,6 @@ async def get_channel_playlist(
             elif access_token != config.security.access_token:
                 raise HTTPException(status_code=401, detail="Invalid access token")
         
-        channels = db.query(Channel).filter(Channel.enabled == True).all()
-        
-        # Fix: Ensure playout_mode is properly converted from string to enum if needed
-        from ..database.models import PlayoutMode
-        for channel in channels:
-            if isinstance(channel.playout_mode, str):
-                # Convert string to enum instance
-                try:
-                    # Normalize the string (lowercase, handle dashes)
-                    normalized = channel.playout_mode.lower().replace('-', '_')
-                    # Try to match by value first (enum values are lowercase: "continuous", "on_demand")
-                    matched = False
-                    for mode in PlayoutMode:
-                        if mode.value.lower() == normalized:
-                            channel.playout_mode = mode
-                            matched = True
-                            break
-                    if not matched:
-                        # Try to match by name (enum names are uppercase: CONTINUOUS, ON_DEMAND)
-                        name_upper = channel.playout_mode.upper().replace('-', '_')
-                        if name_upper in ["CONTINUOUS", "ON_DEMAND"]:
-                            channel.playout_mode = PlayoutMode[name_upper]
-                        else:
-                            # Try direct lookup
-                            channel.playout_mode = PlayoutMode[channel.playout_mode.upper()]
-                except (KeyError, AttributeError) as e:
-                    # If conversion fails, default to CONTINUOUS
-                    logger.warning(f"Invalid playout_mode '{channel.playout_mode}' for channel {channel.number}, defaulting to CONTINUOUS: {e}")
-                    channel.playout_mode = PlayoutMode.CONTINUOUS
-        
         # Always derive base_url from the incoming request so tvg-logo/icon URLs match
         # the address Plex/clients use (avoids 127.0.0.1 vs LAN IP issues).
         base_url = config.server.base_url
@@ -107,30 +512,24 @@ async def get_channel_playlist(
             else:
                 base_url = f"{scheme}://{host}"
         
-        m3u_content = "#EXTM3U\n"
+        # Key on the derived extension, not the raw ?mode= string
+        stream_ext = _m3u_stream_ext(mode)
+        cache_key = (base_url, stream_ext, access_token)
+        cached = _cache_get(_M3U_CACHE, cache_key, _M3U_CACHE_TTL)
+        if cached:
+            return Response(content=cached[1], media_type="application/vnd.apple.mpegurl")
         
+        channels = db.query(Channel).filter(Channel.enabled == True).all()
+        
+        # Fix: Ensure playout_mode/streaming_mode are enums even if loaded as strings
         for channel in channels:
-            try:
-                token_param = f"?access_token={access_token}" if access_token else ""
-                
-                if mode == "hls" or mode == "mixed":
-                    stream_url = f"{base_url}/iptv/channel/{channel.number}.m3u8{token_param}"
-                else:
-                    stream_url = f"{base_url}/iptv/channel/{channel.number}.ts{token_param}"
-                
-                logo_url = _resolve_logo_url(channel, base_url)
-                m3u_content += f'#EXTINF:-1 tvg-id="{channel.number}" tvg-name="{channel.name}"'
-                if channel.group:
-                    m3u_content += f' group-title="{channel.group}"'
-                if logo_url:
-                    m3u_content += f' tvg-logo="{logo_url}"'
-                m3u_content += f',{channel.name}\n'
-                m3u_content += f"{stream_url}\n"
-            except Exception as e:
-                logger.error(f"Error processing channel {channel.number if channel else 'unknown'} for M3U: {e}", exc_info=True)
-                # Continue with next channel instead of failing entire request
+            _normalize_channel_enums(channel)
         
-        return Response(content=m3u_content, media_type="application/vnd.apple.mpegurl")
+        return StreamingResponse(
+            _cache_stream(_M3U_CACHE, cache_key, _iter_m3u(channels, base_url, access_token, stream_ext),
+                          _M3U_CACHE_TTL, _M3U_CACHE_MAX),
+            media_type="application/vnd.apple.mpegurl"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -153,7 +552,6 @@ async def get_epg(
     db: Session = Depends(get_db)
 ):
     """Get Electronic Program Guide (XMLTV format)"""
-    import time
     perf_start_time = time.time()  # Performance timing (float)
     
     try:
@@ -166,98 +564,6 @@ async def get_epg(
             elif access_token != config.security.access_token:
                 raise HTTPException(status_code=401, detail="Invalid access token")
         
-        # Query channels - handle enum validation errors with fallback to raw SQL
-        try:
-            channels = db.query(Channel).filter(Channel.enabled == True).all()
-        except (LookupError, ValueError) as query_error:
-            # Handle SQLAlchemy enum validation errors by querying raw values and converting
-            error_str = str(query_error)
-            if "is not among the defined enum values" in error_str or "streamingmode" in error_str.lower() or "playoutmode" in error_str.lower():
-                logger.warning(f"SQLAlchemy enum validation error when querying channels for XMLTV: {query_error}")
-                logger.info("Attempting to query channels using raw SQL to work around enum validation issue...")
-                # Query using raw SQL to avoid enum validation, then construct Channel objects
-                from sqlalchemy import text
-                raw_result = db.execute(text("""
-                    SELECT id, number, name, playout_mode, enabled, "group", logo_path,
-                           streaming_mode, is_yaml_source, transcode_profile, created_at, updated_at
-                    FROM channels WHERE enabled = 1
-                """)).fetchall()
-                channels = []
-                from ..database.models import PlayoutMode, StreamingMode
-                for row in raw_result:
-                    channel = Channel()
-                    channel.id = row[0]
-                    channel.number = row[1]
-                    channel.name = row[2]
-                    # Convert playout_mode string to enum
-                    playout_mode_str = row[3] if row[3] else "continuous"
-                    normalized = playout_mode_str.lower()
-                    playout_mode_enum = PlayoutMode.CONTINUOUS
-                    for mode in PlayoutMode:
-                        if mode.value.lower() == normalized:
-                            playout_mode_enum = mode
-                            break
-                    else:
-                        try:
-                            playout_mode_enum = PlayoutMode[playout_mode_str.upper()]
-                        except KeyError:
-                            playout_mode_enum = PlayoutMode.CONTINUOUS
-                    channel.playout_mode = playout_mode_enum
-                    # Convert streaming_mode string to enum
-                    streaming_mode_str = row[7] if row[7] else "transport_stream_hybrid"
-                    normalized = streaming_mode_str.lower()
-                    streaming_mode_enum = StreamingMode.TRANSPORT_STREAM_HYBRID
-                    for mode in StreamingMode:
-                        if mode.value.lower() == normalized:
-                            streaming_mode_enum = mode
-                            break
-                    else:
-                        try:
-                            streaming_mode_enum = StreamingMode[streaming_mode_str.upper()]
-                        except KeyError:
-                            streaming_mode_enum = StreamingMode.TRANSPORT_STREAM_HYBRID
-                    channel.streaming_mode = streaming_mode_enum
-                    channel.enabled = bool(row[4])
-                    channel.group = row[5]
-                    channel.logo_path = row[6]
-                    channel.is_yaml_source = bool(row[8])
-                    channel.transcode_profile = row[9]
-                    channels.append(channel)
-                logger.info(f"Loaded {len(channels)} channels using raw SQL query for XMLTV")
-            else:
-                # Re-raise if it's a different error
-                raise
-        
-        # Fix: Ensure playout_mode is properly converted from string to enum if needed
-        from ..database.models import PlayoutMode
-        for channel in channels:
-            if isinstance(channel.playout_mode, str):
-                # Convert string to enum instance
-                try:
-                    # Normalize the string (lowercase, handle dashes)
-                    normalized = channel.playout_mode.lower().replace('-', '_')
-                    # Try to match by value first (enum values are lowercase: "continuous", "on_demand")
-                    matched = False
-                    for mode in PlayoutMode:
-                        if mode.value.lower() == normalized:
-                            channel.playout_mode = mode
-                            matched = True
-                            break
-                    if not matched:
-                        # Try to match by name (enum names are uppercase: CONTINUOUS, ON_DEMAND)
-                        name_upper = channel.playout_mode.upper().replace('-', '_')
-                        if name_upper in ["CONTINUOUS", "ON_DEMAND"]:
-                            channel.playout_mode = PlayoutMode[name_upper]
-                    else:
-                            # Try direct lookup
-                        channel.playout_mode = PlayoutMode[channel.playout_mode.upper()]
-                except (KeyError, AttributeError) as e:
-                    # If conversion fails, default to CONTINUOUS
-                    logger.warning(f"Invalid playout_mode '{channel.playout_mode}' for channel {channel.number}, defaulting to CONTINUOUS: {e}")
-                    channel.playout_mode = PlayoutMode.CONTINUOUS
-        
-        logger.info(f"Generating XMLTV EPG for {len(channels)} channels")
-        
         base_url = config.server.base_url
         if request:
             scheme = request.url.scheme
@@ -268,16 +574,83 @@ async def get_epg(
             else:
                 base_url = f"{scheme}://{host}"
         
+        # Identical requests within the TTL reuse the previously generated document
+        cache_key = (base_url, plain)
+        cached = _cache_get(_EPG_CACHE, cache_key, _EPG_CACHE_TTL)
+        if cached:
+            generated_at, body = cached
+            return Response(
+                content=body,
+                media_type="application/xml; charset=utf-8",
+                headers={
+                    "Content-Disposition": "inline; filename=xmltv.xml",
+                    "Cache-Control": "public, max-age=300",  # Cache for 5 minutes
+                    "X-Generated-At": datetime.utcfromtimestamp(generated_at).strftime("%Y-%m-%d %H:%M:%S UTC"),
+                }
+            )
+        
+        # Channel mode columns are plain strings converted by Channel._on_load, so the
+        # ORM query cannot trip over unknown enum values
+        channels = db.query(Channel).filter(Channel.enabled == True).all()
+        
+        # Fix: Ensure playout_mode/streaming_mode are enums even if loaded as strings
+        for channel in channels:
+            _normalize_channel_enums(channel)
+        
+        logger.info(f"Generating XMLTV EPG for {len(channels)} channels")
+        
         # Generate EPG based on configured build days
         now = datetime.utcnow()
         build_days = config.playout.build_days
         end_time = now + timedelta(days=build_days)
+        now_ts = _epoch(now)
+        end_ts = _epoch(end_time)
+        # Placeholder programmes all span the whole build window
+        now_str = _xmltv_time(now_ts)
+        end_str = _xmltv_time(end_ts)
+        
+        # Batch-load database schedules and playlists for all channels so the
+        # per-channel loop below never goes back to the database
+        channel_ids = [channel.id for channel in channels]
+        schedules_by_channel = defaultdict(list)
+        for schedule in db.query(Schedule).filter(
+            Schedule.channel_id.in_(channel_ids),
+            Schedule.start_time <= end_time
+        ).all():
+            schedules_by_channel[schedule.channel_id].append(schedule)
+        playlists_by_channel = defaultdict(list)
+        for playlist in db.query(Playlist).filter(
+            Playlist.channel_id.in_(channel_ids)
+        ).order_by(Playlist.id).all():
+            playlists_by_channel[playlist.channel_id].append(playlist)
+        
+        # Playlist items already zipped with their media items from a single JOIN
+        # (ordered, first 200 per playlist); items without a media item are skipped.
+        # Only schedule playlists and each channel's first playlist (the fallback) are read.
+        playlist_ids = {s.playlist_id for group in schedules_by_channel.values() for s in group if s.playlist_id}
+        playlist_ids.update(group[0].id for group in playlists_by_channel.values())
+        playlist_rows = defaultdict(list)
+        if playlist_ids:
+            for playlist_item, media_item in db.query(PlaylistItem, MediaItem).join(
+                MediaItem, MediaItem.id == PlaylistItem.media_item_id
+            ).filter(
+                PlaylistItem.playlist_id.in_(playlist_ids)
+            ).order_by(PlaylistItem.playlist_id, PlaylistItem.order).all():
+                rows = playlist_rows[playlist_item.playlist_id]
+                if len(rows) < 200:
+                    rows.append((playlist_item, media_item))
+        playback_positions = {
+            position.channel_id: position
+            for position in db.query(ChannelPlaybackPosition).filter(
+                ChannelPlaybackPosition.channel_id.in_(channel_ids)
+            ).all()
+        }
         
         # Build XML header; optionally include XSL stylesheet for browsers
-        xml_content = '<?xml version="1.0" encoding="UTF-8"?>\n'
+        xml_parts = ['<?xml version="1.0" encoding="UTF-8"?>\n']
         if not plain:
-            xml_content += '<?xml-stylesheet type="text/xsl" href="https://raw.githubusercontent.com/XMLTV/xmltv/master/xmltv.xsl"?>\n'
-        xml_content += '<tv generator-info-name="StreamTV" generator-info-url="https://github.com/streamtv" source-info-name="StreamTV">\n'
+            xml_parts.append('<?xml-stylesheet type="text/xsl" href="https://raw.githubusercontent.com/XMLTV/xmltv/master/xmltv.xsl"?>\n')
+        xml_parts.append('<tv generator-info-name="StreamTV" generator-info-url="https://github.com/streamtv" source-info-name="StreamTV">\n')
         
         # Initialize Plex API client if configured for schedule/EPG integration
         plex_client = None
@@ -307,204 +680,154 @@ async def get_epg(
                 logger.warning(f"Plex API client initialization failed: {e}. EPG will use standard format.")
                 plex_client = None
         
-        # Channel definitions - ensure Plex-compatible format
-        for channel in channels:
-            # Use channel number as ID (Plex expects numeric or alphanumeric IDs)
-            channel_id = str(channel.number).strip()
-            xml_content += f'  <channel id="{_xml(channel_id)}">\n'
-            
-            # Primary display name (required)
-            xml_content += f'    <display-name>{_xml(channel.name)}</display-name>\n'
-            
-            # Additional display names for grouping
-            if channel.group:
-                xml_content += f'    <display-name>{_xml(channel.group)}</display-name>\n'
-            
-            # Channel number as display name (Plex compatibility)
-            xml_content += f'    <display-name>{_xml(channel_id)}</display-name>\n'
-            
-            # Logo/icon (Plex expects absolute URLs). Fall back to default icon by number.
-            logo_url = _resolve_logo_url(channel, base_url)
-            if logo_url:
-                xml_content += f'    <icon src="{_xml(logo_url)}"/>\n'
-            
-            xml_content += '  </channel>\n'
+        # Parsed meta_data per media item; cyclic schedules repeat the same items many times
+        meta_cache: Dict[int, dict] = {}
         
-        # Program listings - optimized with early exit
-        for channel in channels:
+        def channel_programmes(channel) -> str:
+            """Build the <programme> entries for one channel."""
+            channel_parts = []
+            # Escaped channel id shared by every <programme> of this channel (must match channel definition)
+            channel_id = _xml(str(channel.number).strip())
             # Try to load schedule file first
             schedule_file = ScheduleParser.find_schedule_file(channel.number)
             schedule_items = []
             
             # Get playout_start_time from database to match actual stream timing
             # This ensures EPG metadata matches what's actually being streamed
-            from streamtv.database.models import ChannelPlaybackPosition
-            playback_pos = db.query(ChannelPlaybackPosition).filter(
-                ChannelPlaybackPosition.channel_id == channel.id
-            ).first()
+            playback_pos = playback_positions.get(channel.id)
             
             # Use playout_start_time if available (for CONTINUOUS channels), otherwise use now
             # This matches the logic in channel_manager._get_current_position()
             playout_start_time = None
             if playback_pos and playback_pos.playout_start_time:
                 playout_start_time = playback_pos.playout_start_time
-                logger.debug(f"Channel {channel.number}: Using playout_start_time {playout_start_time} for EPG")
+                logger.debug("Channel %s: Using playout_start_time %s for EPG", channel.number, playout_start_time)
             else:
                 # No saved playout_start_time - use now (first time or ON_DEMAND channel)
                 playout_start_time = now
-                logger.debug(f"Channel {channel.number}: No saved playout_start_time, using now ({now}) for EPG")
+                logger.debug("Channel %s: No saved playout_start_time, using now (%s) for EPG", channel.number, now)
             
             if schedule_file:
                 try:
-                    parsed_schedule = ScheduleParser.parse_file(schedule_file, schedule_file.parent)
+                    parsed_schedule = _parsed_schedule(schedule_file)
                     schedule_engine = ScheduleEngine(db)
                     # Generate items to fill 24 hours (max 500 items per channel for performance)
                     schedule_items = schedule_engine.generate_playlist_from_schedule(
                         channel, parsed_schedule, max_items=500
                     )
-                    logger.info(f"Generated {len(schedule_items)} schedule items for channel {channel.number}")
+                    logger.info("Generated %d schedule items for channel %s", len(schedule_items), channel.number)
                     
-                    # Calculate total cycle duration (sum of all item durations)
-                    total_duration = sum(
-                        (item.get('media_item', {}).duration or 1800)
+                    # Cumulative end offset of each item within the cycle; items without a
+                    # media_item take no time, matching how the stream skips them
+                    cycle_offsets = list(itertools.accumulate(
+                        (item['media_item'].duration or 1800) if item['media_item'] else 0
                         for item in schedule_items
-                        if item.get('media_item')
-                    )
+                    ))
+                    total_duration = cycle_offsets[-1] if cycle_offsets else 0
+                    
+                    # Cycle math runs on integer epoch seconds; datetimes are only
+                    # materialised for the items that survive the time-range filter
+                    playout_start_ts = _epoch(playout_start_time)
                     
                     # Calculate which item should be playing "now" using same logic as stream
                     # This ensures EPG matches what's actually streaming
                     if total_duration > 0 and playout_start_time:
-                        elapsed = (now - playout_start_time).total_seconds()
-                        cycle_position = elapsed % total_duration if total_duration > 0 else 0
+                        elapsed = now_ts - playout_start_ts
+                        cycle_position = elapsed % total_duration
                         
-                        # Find which item index corresponds to cycle_position
-                        current_time = 0
-                        current_item_index = 0
-                        for idx, item in enumerate(schedule_items):
-                            media_item = item.get('media_item')
-                            if not media_item:
-                                continue
-                            duration = media_item.duration or 1800
-                            if current_time + duration > cycle_position:
-                                current_item_index = idx
-                                break
-                            current_time += duration
-                            current_item_index = idx + 1
+                        # First item whose end offset lies past cycle_position is playing now
+                        current_item_index = bisect.bisect_right(cycle_offsets, cycle_position)
                         
                         if current_item_index >= len(schedule_items):
                             current_item_index = 0
                         
-                        logger.debug(f"Channel {channel.number}: EPG calculated current item index {current_item_index} based on playout_start_time")
+                        logger.debug("Channel %s: EPG calculated current item index %d based on playout_start_time", channel.number, current_item_index)
+                    
+                    # Start time (epoch seconds) of each item; None until assigned
+                    item_start_ts = [
+                        _epoch(item['start_time']) if item['start_time'] else None
+                        for item in schedule_items
+                    ]
                     
                     # Assign start times if not set (for repeat=True schedules)
                     # Start from the item that should be playing "now" based on playout_start_time
-                    items_without_time = sum(1 for item in schedule_items if not item.get('start_time'))
+                    items_without_time = item_start_ts.count(None)
                     if items_without_time > 0:
-                        logger.info(f"Assigning start times to {items_without_time} items without start_time for channel {channel.number}")
+                        logger.info("Assigning start times to %d items without start_time for channel %s", items_without_time, channel.number)
                         
                         # Calculate when the current item started playing
                         if total_duration > 0 and playout_start_time:
                             # Calculate how many full cycles have elapsed
-                            elapsed = (now - playout_start_time).total_seconds()
-                            cycles_completed = int(elapsed // total_duration) if total_duration > 0 else 0
-                            cycle_position = elapsed % total_duration if total_duration > 0 else 0
+                            elapsed = now_ts - playout_start_ts
+                            cycles_completed = elapsed // total_duration
+                            cycle_position = elapsed % total_duration
                             
-                            # Find start time of current item within the cycle
-                            current_time_in_cycle = 0
-                            current_item_start_in_cycle = 0
-                            for idx, item in enumerate(schedule_items):
-                                media_item = item.get('media_item')
-                                if not media_item:
-                                    continue
-                                duration = media_item.duration or 1800
-                                if current_time_in_cycle + duration > cycle_position:
-                                    current_item_start_in_cycle = current_time_in_cycle
-                                    break
-                                current_time_in_cycle += duration
+                            # Start time of current item within the cycle is the previous item's end offset
+                            playing_index = bisect.bisect_right(cycle_offsets, cycle_position)
+                            current_item_start_in_cycle = cycle_offsets[playing_index - 1] if playing_index else 0
                             
                             # Calculate absolute start time of current item
-                            current_item_start_time = playout_start_time + timedelta(
-                                seconds=(cycles_completed * total_duration) + current_item_start_in_cycle
-                            )
+                            current_item_ts = playout_start_ts + (cycles_completed * total_duration) + current_item_start_in_cycle
                         else:
                             # Fallback: start from now
-                            current_item_start_time = now
+                            current_item_ts = now_ts
                         
                         # Assign start times starting from current item
-                        current_item_time = current_item_start_time
                         # Start from current_item_index to maintain continuity
                         for i in range(len(schedule_items)):
                             idx = (current_item_index + i) % len(schedule_items)
-                            item = schedule_items[idx]
-                            if not item.get('start_time'):
-                                item['start_time'] = current_item_time
-                                media_item = item.get('media_item')
+                            if item_start_ts[idx] is None:
+                                item_start_ts[idx] = current_item_ts
+                                media_item = schedule_items[idx]['media_item']
                                 if media_item:
                                     duration = media_item.duration or 1800
                                 else:
                                     duration = 1800
-                                    logger.warning(f"Schedule item missing media_item for channel {channel.number}")
-                                current_item_time = current_item_time + timedelta(seconds=duration)
+                                    logger.warning("Schedule item missing media_item for channel %s", channel.number)
+                                current_item_ts += duration
                     
                     # Filter to only items within time range (now to end_time)
                     # Ensure all items have start_time set
                     filtered_items = []
-                    for item in schedule_items:
-                        if not item.get('start_time'):
+                    for item, start in zip(schedule_items, item_start_ts):
+                        if start is None:
                             # Skip items without start_time - they should have been assigned above
                             continue
-                        start = item['start_time']
                         # Include items that start between now and end_time
                         # Also include items that are currently playing (start < now but end > now)
-                        media_item = item.get('media_item')
+                        media_item = item['media_item']
                         if media_item:
-                            duration = media_item.duration or 1800
-                            end = start + timedelta(seconds=duration)
+                            end = start + (media_item.duration or 1800)
                             # Include if it starts in the future OR is currently playing
-                            if (start >= now and start <= end_time) or (start < now and end > now):
-                                filtered_items.append(item)
-                        elif start >= now and start <= end_time:
+                            keep = (now_ts <= start <= end_ts) or (start < now_ts and end > now_ts)
+                        else:
+                            keep = now_ts <= start <= end_ts
+                        if keep:
+                            if not item['start_time']:
+                                item['start_time'] = datetime.utcfromtimestamp(start)
                             filtered_items.append(item)
                     schedule_items = filtered_items
-                    logger.info(f"After filtering: {len(schedule_items)} items within time range ({now} to {end_time}) for channel {channel.number}")
+                    logger.info("After filtering: %d items within time range (%s to %s) for channel %s", len(schedule_items), now, end_time, channel.number)
                 except Exception as e:
-                    logger.warning(f"Failed to load schedule file for EPG: {e}")
+                    logger.warning("Failed to load schedule file for EPG: %s", e)
             
             # Fallback to database schedules if schedule file not available
             if not schedule_items:
-                schedules = db.query(Schedule).filter(
-                    Schedule.channel_id == channel.id,
-                    Schedule.start_time <= end_time
-                ).all()
-                logger.debug(f"Channel {channel.number} ({channel.name}): Found {len(schedules)} database schedules")
+                schedules = schedules_by_channel[channel.id]
+                logger.debug("Channel %s (%s): Found %d database schedules", channel.number, channel.name, len(schedules))
                 
-                # Get playlists for this channel with eager loading
-                playlists = db.query(Playlist).filter(Playlist.channel_id == channel.id).all()
-                logger.debug(f"Channel {channel.number} ({channel.name}): Found {len(playlists)} playlists")
+                # Playlists for this channel (batch loaded above)
+                playlists = playlists_by_channel[channel.id]
+                logger.debug("Channel %s (%s): Found %d playlists", channel.number, channel.name, len(playlists))
                 
                 # Generate programs from schedules
                 for schedule in schedules:
                     if schedule.playlist_id:
-                        playlist = db.query(Playlist).filter(Playlist.id == schedule.playlist_id).first()
-                        if playlist:
-                            # Eager load playlist items with media items
-                            items = db.query(PlaylistItem).filter(
-                                PlaylistItem.playlist_id == playlist.id
-                            ).order_by(PlaylistItem.order).limit(200).all()  # Limit to 200 items
-                            
-                            # Batch load all media items
-                            media_ids = [item.media_item_id for item in items]
-                            if media_ids:
-                                media_items_dict = {
-                                    mi.id: mi for mi in db.query(MediaItem).filter(MediaItem.id.in_(media_ids)).all()
-                                }
-                            else:
-                                media_items_dict = {}
-                            
+                        items = playlist_rows.get(schedule.playlist_id)
+                        if items:
                             schedule_time = schedule.start_time
-                            for item in items:
-                                media_item = media_items_dict.get(item.media_item_id)
-                                if media_item and schedule_time <= end_time:
+                            for _, media_item in items:
+                                if schedule_time <= end_time:
                                     schedule_items.append({
                                         'media_item': media_item,
                                         'custom_title': None,
@@ -520,170 +843,139 @@ async def get_epg(
                 if not schedule_items and playlists:
                     # Use first playlist to fill schedule
                     playlist = playlists[0]
-                    logger.info(f"Channel {channel.number} ({channel.name}): Using playlist '{playlist.name}' (ID: {playlist.id}) for EPG generation")
-                    items = db.query(PlaylistItem).filter(
-                        PlaylistItem.playlist_id == playlist.id
-                    ).order_by(PlaylistItem.order).limit(200).all()
-                    logger.debug(f"Channel {channel.number} ({channel.name}): Found {len(items)} playlist items")
+                    logger.info("Channel %s (%s): Using playlist '%s' (ID: %s) for EPG generation", channel.number, channel.name, playlist.name, playlist.id)
+                    items = playlist_rows.get(playlist.id, [])
+                    logger.debug("Channel %s (%s): Found %d playlist items", channel.number, channel.name, len(items))
                     
                     if items:
-                        # Batch load all media items
-                        media_ids = [item.media_item_id for item in items]
-                        if media_ids:
-                            media_items_dict = {
-                                mi.id: mi for mi in db.query(MediaItem).filter(MediaItem.id.in_(media_ids)).all()
-                            }
-                        else:
-                            media_items_dict = {}
+                        # Item durations, computed once for the cycle math and the fill loop
+                        durations = [(media_item.duration or 1800) for _, media_item in items]
                         
                         # Use playout_start_time if available (for CONTINUOUS channels), otherwise use now
                         # This ensures EPG matches what's actually being streamed
                         if playback_pos and playback_pos.playout_start_time:
-                            playout_start_time = playback_pos.playout_start_time
+                            playout_start_ts = _epoch(playback_pos.playout_start_time)
                             
-                            # Calculate which item should be playing "now" using same logic as stream
-                            total_duration = sum(
-                                (media_items_dict.get(item.media_item_id, {}).duration or 1800)
-                                for item in items
-                                if media_items_dict.get(item.media_item_id)
-                            )
+                            # Cumulative end offset of each item within the cycle
+                            cycle_offsets = list(itertools.accumulate(durations))
+                            total_duration = cycle_offsets[-1]
                             
                             if total_duration > 0:
-                                elapsed = (now - playout_start_time).total_seconds()
+                                elapsed = now_ts - playout_start_ts
                                 cycle_position = elapsed % total_duration
                                 
-                                # Find which item index corresponds to cycle_position
-                                current_time = 0
-                                current_item_index = 0
-                                for idx, item in enumerate(items):
-                                    media_item = media_items_dict.get(item.media_item_id)
-                                    if not media_item:
-                                        continue
-                                    duration = media_item.duration or 1800
-                                    if current_time + duration > cycle_position:
-                                        current_item_index = idx
-                                        break
-                                    current_time += duration
-                                    current_item_index = idx + 1
-                                
+                                # First item whose end offset lies past cycle_position is playing now
+                                current_item_index = bisect.bisect_right(cycle_offsets, cycle_position)
                                 if current_item_index >= len(items):
                                     current_item_index = 0
+                                current_item_start_in_cycle = cycle_offsets[current_item_index - 1] if current_item_index else 0
+                                cycles_completed = elapsed // total_duration
                                 
-                                # Calculate when the current item started playing
-                                cycles_completed = int(elapsed // total_duration) if total_duration > 0 else 0
-                                current_time_in_cycle = 0
-                                current_item_start_in_cycle = 0
-                                for idx, item in enumerate(items):
-                                    media_item = media_items_dict.get(item.media_item_id)
-                                    if not media_item:
-                                        continue
-                                    duration = media_item.duration or 1800
-                                    if current_time_in_cycle + duration > cycle_position:
-                                        current_item_start_in_cycle = current_time_in_cycle
-                                        break
-                                    current_time_in_cycle += duration
-                                
-                                # Calculate absolute start time of current item
-                                schedule_time = playout_start_time + timedelta(
-                                    seconds=(cycles_completed * total_duration) + current_item_start_in_cycle
-                                )
+                                # Calculate absolute start time (epoch seconds) of current item
+                                schedule_ts = playout_start_ts + (cycles_completed * total_duration) + current_item_start_in_cycle
                                 item_index = current_item_index
-                                logger.debug(f"Channel {channel.number}: EPG fallback using playout_start_time, starting from item {item_index} at {schedule_time}")
+                                logger.debug("Channel %s: EPG fallback using playout_start_time, starting from item %d at epoch %d", channel.number, item_index, schedule_ts)
                             else:
-                                schedule_time = now
+                                schedule_ts = now_ts
                                 item_index = 0
                         else:
-                            schedule_time = now
+                            schedule_ts = now_ts
                             item_index = 0
                         
-                        while schedule_time < end_time and items and len(schedule_items) < 500:
-                            item = items[item_index % len(items)]
-                            media_item = media_items_dict.get(item.media_item_id)
-                            if media_item:
-                                schedule_items.append({
-                                    'media_item': media_item,
-                                    'custom_title': None,
-                                    'filler_kind': None,
-                                    'start_time': schedule_time
-                                })
-                                schedule_time = schedule_time + timedelta(seconds=media_item.duration or 1800)
-                                item_index += 1
-                            else:
-                                logger.warning(f"Channel {channel.number} ({channel.name}): Playlist item {item.id} has no associated media_item")
-                                break
-                    
-                    if not schedule_items and items:
-                        logger.warning(f"Channel {channel.number} ({channel.name}): Playlist has {len(items)} items but no valid media_items found")
+                        item_count = len(items)
+                        while schedule_ts < end_ts and len(schedule_items) < 500:
+                            position = item_index % item_count
+                            schedule_items.append({
+                                'media_item': items[position][1],
+                                'custom_title': None,
+                                'filler_kind': None,
+                                'start_time': datetime.utcfromtimestamp(schedule_ts)
+                            })
+                            schedule_ts += durations[position]
+                            item_index += 1
+                    else:
+                        logger.warning("Channel %s (%s): Playlist '%s' has no items with a media item", channel.number, channel.name, playlist.name)
             
             # Generate EPG entries from schedule items
             # If no schedule items, add a placeholder programme so Plex can map the channel
             # Plex requires at least one programme entry per channel
             if not schedule_items:
-                logger.warning(f"No schedule items found for channel {channel.number} ({channel.name}) - adding placeholder")
+                logger.warning("No schedule items found for channel %s (%s) - adding placeholder", channel.number, channel.name)
                 # Add a placeholder programme for the full EPG build period to ensure Plex shows something
                 # Use the full end_time instead of just 24 hours to cover the entire EPG period
-                start_str = now.strftime("%Y%m%d%H%M%S +0000")
-                end_str = end_time.strftime("%Y%m%d%H%M%S +0000")
-                channel_id = str(channel.number).strip()
-                xml_content += f'  <programme start="{_xml(start_str)}" stop="{_xml(end_str)}" channel="{_xml(channel_id)}">\n'
                 # Use a more descriptive title that Plex will recognize
-                xml_content += f'    <title lang="en">{_xml(channel.name)} - Live Stream</title>\n'
-                xml_content += f'    <desc lang="en">Continuous live programming on {_xml(channel.name)}. This channel streams content 24/7.</desc>\n'
-                xml_content += '    <category lang="en">General</category>\n'
-                xml_content += '    <category lang="en">Live</category>\n'
-                xml_content += '  </programme>\n'
+                channel_name_xml = _xml(channel.name)
+                channel_parts.append(
+                    f'  <programme start="{now_str}" stop="{end_str}" channel="{channel_id}">\n'
+                    f'    <title lang="en">{channel_name_xml} - Live Stream</title>\n'
+                    f'    <desc lang="en">Continuous live programming on {channel_name_xml}. This channel streams content 24/7.</desc>\n'
+                    f'{_GENERAL_CATEGORY_XML}{_LIVE_CATEGORY_XML}'
+                    '  </programme>\n'
+                )
             else:
                 # Log first and last programme times for debugging
                 if schedule_items:
                     first_start = schedule_items[0].get('start_time')
                     last_item = schedule_items[-1] if schedule_items else None
                     if first_start:
-                        logger.debug(f"Channel {channel.number} EPG: First programme at {first_start}, {len(schedule_items)} total items")
+                        logger.debug("Channel %s EPG: First programme at %s, %d total items", channel.number, first_start, len(schedule_items))
             
-            current_time = now
+            # Programme times are tracked as integer epoch seconds
+            current_ts = now_ts
             programme_count = 0
+            # Back-to-back programmes start when the previous one stops, so its
+            # formatted stop time can usually be reused as the next start
+            last_stop_ts = None
+            last_stop_str = None
             max_programmes_per_channel = 200  # Limit programmes per channel for performance
             
             for schedule_item in schedule_items:
                 if programme_count >= max_programmes_per_channel:
                     break
                     
-                media_item = schedule_item.get('media_item')
+                media_item = schedule_item['media_item']
                 if not media_item:
-                    logger.debug(f"Skipping schedule item without media_item for channel {channel.number}")
+                    logger.debug("Skipping schedule item without media_item for channel %s", channel.number)
+                    continue
+                
+                duration = media_item.duration or 1800
+                
+                # Calculate start/end times
+                start_time = schedule_item['start_time']
+                start_ts = _epoch(start_time) if start_time else current_ts
+                stop_ts = start_ts + duration
+                
+                # Only include if within EPG time range
+                # Include programmes that are currently playing (start < now but end > now) or start in the future
+                is_currently_playing = start_ts < now_ts and stop_ts > now_ts
+                is_future = now_ts <= start_ts <= end_ts
+                current_ts = stop_ts
+                if not (is_currently_playing or is_future):
+                    # Out-of-range items skip the title/metadata work entirely
+                    if current_ts > end_ts:
+                        break
                     continue
                 
                 # Use custom title if available, otherwise use media item title.
                 # If missing, fall back to the URL basename to avoid Plex showing "Unknown Airing".
-                title = schedule_item.get('custom_title') or media_item.title
+                title = schedule_item['custom_title'] or media_item.title
                 if not title or not title.strip():
-                    try:
-                        from pathlib import Path
-                        parsed_url = urllib.parse.unquote(media_item.url or "")
-                        fallback_base = Path(parsed_url).name.rsplit('.', 1)[0]
-                        title = fallback_base or channel.name
-                    except Exception:
-                        title = channel.name
+                    title = _url_basename(media_item.url or "") or channel.name
                 title = title.strip()
                 
-                # Extract episode-specific information from metadata for better titles
-                episode_title = None
-                season_num = None
-                episode_num = None
-                if media_item.meta_data:
-                    try:
-                        import json
-                        meta = json.loads(media_item.meta_data)
-                        episode_title = meta.get('episode_title') or meta.get('title')
-                        season_num = meta.get('season')
-                        episode_num = meta.get('episode')
-                    except Exception:
-                        pass
+                # Extract episode-specific information from metadata in one pass; the raw
+                # season/episode/categories values also feed the tags emitted further down
+                meta = _media_meta(media_item, meta_cache)
+                episode_title = meta.get('episode_title') or meta.get('title')
+                meta_season = meta.get('season')
+                meta_episode = meta.get('episode')
+                meta_categories = meta.get('categories')
+                season_num = meta_season
+                episode_num = meta_episode
                 
                 # Also try to extract season/episode from title if it matches patterns like "S03E05" or "S03E00"
-                import re
                 if season_num is None or episode_num is None:
-                    title_match = re.search(r'[Ss](\d+)[Ee](\d+)', title)
+                    title_match = _SE_RE.search(title)
                     if title_match:
                         if season_num is None:
                             season_num = int(title_match.group(1))
@@ -697,7 +989,7 @@ async def get_epg(
                     desc = media_item.description
                     # If description has air date but no episode title, use air date as identifier
                     # Match full date including year: "July 21, 1969" or "November 10, 1969"
-                    air_date_match = re.search(r'Original air date:\s*([A-Za-z]+\s+\d+,\s+\d{4})', desc)
+                    air_date_match = _AIRDATE_RE.search(desc)
                     if air_date_match:
                         air_date = air_date_match.group(1).strip()
                         if air_date:
@@ -710,7 +1002,7 @@ async def get_epg(
                 # Clean up title to remove collection suffixes and season/episode patterns for better display
                 show_name = title
                 # Remove season/episode pattern from title (e.g., "Show Name S03E00" -> "Show Name")
-                title_clean = re.sub(r'\s+[Ss]\d+[Ee]\d+$', '', title)
+                title_clean = _SE_SUFFIX_RE.sub('', title)
                 if title_clean != title:
                     show_name = title_clean
                     title = show_name
@@ -727,181 +1019,163 @@ async def get_epg(
                             # Keep collection info for reference but use clean show name
                             title = show_name
                 
-                if season_num is not None and episode_num is not None:
-                    # Format: "Show Name" with sub-title "S03E05 - Episode Title"
-                    # Don't modify title here, will use sub-title field below
-                    pass
-                elif episode_num is not None:
-                    # Format: "Show Name" with sub-title "Episode X"
-                    # Don't modify title, will use sub-title
-                    pass
-                elif episode_title and air_date:
-                    # For Sesame Street with air dates, keep title clean, use sub-title
-                    # Don't modify title here
-                    pass
+                # The title stays the clean show name; episode details go in the sub-title.
+                # An episode title is only shown when it adds something beyond the title/air date.
+                show_episode_title = bool(episode_title) and episode_title != title and 'Original air date' not in episode_title
                 
-                duration = media_item.duration or 1800
+                programme_count += 1
+                start_str = last_stop_str if start_ts == last_stop_ts else _xmltv_time(start_ts)
+                last_stop_ts = stop_ts
+                last_stop_str = stop_str = _xmltv_time(stop_ts)
                 
-                # Calculate start/end times
-                if schedule_item.get('start_time'):
-                    start_time = schedule_item['start_time']
-                else:
-                    start_time = current_time
+                # Optional elements are rendered to strings first and the whole
+                # programme is emitted with a single append
                 
-                end_time_prog = start_time + timedelta(seconds=duration)
+                # Add sub-title if we have episode-specific information
+                # This helps Plex display episode details better
+                sub_title = None
+                if season_num is not None and episode_num is not None:
+                    sub_title = f"S{int(season_num):02d}E{int(episode_num):02d}"
+                    if show_episode_title:
+                        sub_title = f"{sub_title} - {episode_title}"
+                elif episode_num is not None:
+                    sub_title = f"Episode {int(episode_num)}"
+                    if show_episode_title:
+                        sub_title = f"{sub_title} - {episode_title}"
+                elif episode_title and air_date:
+                    # For Sesame Street with air dates, use air date as sub-title
+                    sub_title = air_date
+                elif show_episode_title:
+                    sub_title = episode_title
+                sub_title_xml = f'    <sub-title lang="en">{_xml(sub_title)}</sub-title>\n' if sub_title is not None else ''
                 
-                # Only include if within EPG time range
-                # Include programmes that are currently playing (start < now but end > now) or start in the future
-                is_currently_playing = start_time < now and end_time_prog > now
-                is_future = start_time >= now and start_time <= end_time
-                if is_currently_playing or is_future:
-                    programme_count += 1
-                    start_str = start_time.strftime("%Y%m%d%H%M%S +0000")
-                    end_str = end_time_prog.strftime("%Y%m%d%H%M%S +0000")
-                    
-                    # Use channel number as ID (must match channel definition)
-                    channel_id = str(channel.number).strip()
-                    xml_content += f'  <programme start="{_xml(start_str)}" stop="{_xml(end_str)}" channel="{_xml(channel_id)}">\n'
-                    
-                    # Title is required by XMLTV spec and Plex
-                    xml_content += f'    <title lang="en">{_xml(title.strip())}</title>\n'
-                    
-                    # Add sub-title if we have episode-specific information
-                    # This helps Plex display episode details better
-                    if season_num is not None and episode_num is not None:
-                        sub_title = f"S{int(season_num):02d}E{int(episode_num):02d}"
-                        if episode_title and episode_title != title and 'Original air date' not in episode_title:
-                            sub_title = f"{sub_title} - {episode_title}"
-                        xml_content += f'    <sub-title lang="en">{_xml(sub_title)}</sub-title>\n'
-                    elif episode_num is not None:
-                        sub_title = f"Episode {int(episode_num)}"
-                        if episode_title and episode_title != title and 'Original air date' not in episode_title:
-                            sub_title = f"{sub_title} - {episode_title}"
-                        xml_content += f'    <sub-title lang="en">{_xml(sub_title)}</sub-title>\n'
-                    elif episode_title and air_date:
-                        # For Sesame Street with air dates, use air date as sub-title
-                        xml_content += f'    <sub-title lang="en">{_xml(air_date)}</sub-title>\n'
-                    elif episode_title and episode_title != title and 'Original air date' not in episode_title:
-                        xml_content += f'    <sub-title lang="en">{_xml(episode_title)}</sub-title>\n'
-                    
-                    # Description - always include for Plex compatibility
-                    # Plex requires desc tag even if empty
-                    desc = media_item.description or ""
-                    # Enhance description with episode info if available
-                    if episode_title and episode_title not in desc and episode_title != title:
-                        if desc:
-                            desc = f"{episode_title}\n\n{desc}"
-                        else:
-                            desc = episode_title
-                    if not desc:
-                        # Provide a non-empty description to avoid "Unknown Airing" in Plex
-                        desc = title
+                # Description - always include for Plex compatibility
+                # Plex requires desc tag even if empty
+                desc = media_item.description or ""
+                # Enhance description with episode info if available
+                if episode_title and episode_title not in desc and episode_title != title:
                     if desc:
-                        xml_content += f'    <desc lang="en">{_xml(desc)}</desc>\n'
+                        desc = f"{episode_title}\n\n{desc}"
                     else:
-                        # Include empty desc to ensure Plex compatibility
-                        xml_content += '    <desc lang="en"></desc>\n'
-                    
-                    # Thumbnail/icon - ensure absolute URL for Plex
-                    if media_item.thumbnail:
-                        # Ensure thumbnail URL is absolute
-                        if media_item.thumbnail.startswith('http'):
-                            # Already absolute, use as-is (may already include Plex token)
-                            thumb_url = media_item.thumbnail
-                        else:
-                            # Relative path - make absolute
-                            thumb_url = f"{base_url}{media_item.thumbnail}" if media_item.thumbnail.startswith('/') else f"{base_url}/{media_item.thumbnail}"
-                        xml_content += f'    <icon src="{_xml(thumb_url)}"/>\n'
-                    
-                    # Enhanced EPG metadata - use standard XMLTV fields only
-                    # Plex expects at least one category
-                    filler_kind = schedule_item.get('filler_kind')
-                    if filler_kind:
-                        xml_content += f'    <category lang="en">{_xml(filler_kind)}</category>\n'
+                        desc = episode_title
+                if not desc:
+                    # Provide a non-empty description to avoid "Unknown Airing" in Plex
+                    desc = title
+                
+                # Thumbnail/icon - ensure absolute URL for Plex
+                icon_xml = ''
+                thumbnail = media_item.thumbnail
+                if thumbnail:
+                    if thumbnail.startswith('http'):
+                        # Already absolute, use as-is (may already include Plex token)
+                        thumb_url = thumbnail
                     else:
-                        # Default category for Plex compatibility
-                        xml_content += '    <category lang="en">General</category>\n'
-                    
-                    # Uploader/Creator (standard XMLTV credits field)
-                    if media_item.uploader:
-                        xml_content += f'    <credits>\n'
-                        xml_content += f'      <director>{_xml(media_item.uploader)}</director>\n'
-                        xml_content += f'    </credits>\n'
-                    
-                    # Upload date (standard XMLTV date field)
-                    if media_item.upload_date:
-                        xml_content += f'    <date>{_xml(media_item.upload_date)}</date>\n'
-                    
-                    # Simplified metadata parsing (reduced for performance)
-                    # Only parse essential fields to speed up XML generation
-                    if media_item.meta_data:
+                        # Relative path - make absolute
+                        thumb_url = f"{base_url}{thumbnail}" if thumbnail.startswith('/') else f"{base_url}/{thumbnail}"
+                    icon_xml = f'    <icon src="{_xml(thumb_url)}"/>\n'
+                
+                # Enhanced EPG metadata - use standard XMLTV fields only
+                # Plex expects at least one category (default "General")
+                filler_kind = schedule_item['filler_kind']
+                category_xml = f'    <category lang="en">{_xml(filler_kind)}</category>\n' if filler_kind else _GENERAL_CATEGORY_XML
+                
+                # Uploader/Creator (standard XMLTV credits field)
+                credits_xml = f'    <credits>\n      <director>{_xml(media_item.uploader)}</director>\n    </credits>\n' if media_item.uploader else ''
+                
+                # Upload date (standard XMLTV date field)
+                date_xml = f'    <date>{_xml(media_item.upload_date)}</date>\n' if media_item.upload_date else ''
+                
+                # Episode numbering and categories from the metadata extracted above
+                episode_xml = ''
+                if meta_episode:
+                    episode_xml = f'    <episode-num system="onscreen">{_xml(str(meta_episode))}</episode-num>\n'
+                    if meta_season:
                         try:
-                            import json
-                            meta = json.loads(media_item.meta_data)
-                            
-                            # Only include most important metadata fields
-                            if meta.get('episode'):
-                                xml_content += f'    <episode-num system="onscreen">{_xml(str(meta.get("episode")))}</episode-num>\n'
-                            
-                            if meta.get('season') and meta.get('episode'):
-                                try:
-                                    season_idx = int(meta.get("season", 0)) - 1
-                                    episode_idx = int(meta.get("episode", 0)) - 1
-                                    season_ep = f'{season_idx}.{episode_idx}.'
-                                    xml_content += f'    <episode-num system="xmltv_ns">{_xml(season_ep)}</episode-num>\n'
-                                except (ValueError, TypeError):
-                                    pass
-                            
-                            # Limit categories to first 3 for performance
-                            # Add lang attribute for Plex compatibility
-                            if meta.get('categories'):
-                                for cat in list(meta.get('categories', []))[:3]:
-                                    xml_content += f'    <category lang="en">{_xml(str(cat))}</category>\n'
-                        except Exception as e:
-                            # Skip metadata parsing errors to avoid slowing down EPG generation
+                            season_ep = f'{int(meta_season) - 1}.{int(meta_episode) - 1}.'
+                            episode_xml += f'    <episode-num system="xmltv_ns">{_xml(season_ep)}</episode-num>\n'
+                        except (ValueError, TypeError):
                             pass
-                    
-                    # Only include standard XMLTV fields - remove custom fields that might confuse Plex
-                    # URL field is optional in XMLTV and can cause issues if it's not accessible
-                    # We'll skip it to avoid Plex metadata grab failures
-                    
-                    xml_content += '  </programme>\n'
                 
-                current_time = end_time_prog
+                # Limit categories to first 3 for performance
+                # Add lang attribute for Plex compatibility
+                categories_xml = ''
+                if meta_categories:
+                    if isinstance(meta_categories, list):
+                        categories = meta_categories[:3]
+                    else:
+                        try:
+                            categories = list(itertools.islice(meta_categories, 3))
+                        except TypeError:
+                            categories = ()
+                    categories_xml = ''.join(f'    <category lang="en">{_xml(str(cat))}</category>\n' for cat in categories)
                 
-                if current_time > end_time:
+                # Only include standard XMLTV fields - remove custom fields that might confuse Plex
+                # URL field is optional in XMLTV and can cause issues if it's not accessible
+                # We'll skip it to avoid Plex metadata grab failures
+                
+                # Title is required by XMLTV spec and Plex
+                channel_parts.append(
+                    f'  <programme start="{start_str}" stop="{stop_str}" channel="{channel_id}">\n'
+                    f'    <title lang="en">{_xml(title.strip())}</title>\n'
+                    f'{sub_title_xml}'
+                    f'    <desc lang="en">{_xml(desc)}</desc>\n'
+                    f'{icon_xml}'
+                    f'{category_xml}'
+                    f'{credits_xml}{date_xml}{episode_xml}{categories_xml}'
+                    '  </programme>\n'
+                )
+                
+                if current_ts > end_ts:
                     break
+            
+            return "".join(channel_parts)
         
-        xml_content += '</tv>\n'
-        
-        # Clean up Plex API client if used
+        # The Plex client is only used for DVR discovery above; release it before streaming
         if plex_client:
             try:
                 await plex_client.__aexit__(None, None, None)
             except Exception as e:
                 logger.debug(f"Plex client cleanup: {e}")
         
-        generation_time = time.time() - perf_start_time
-        logger.info(f"XMLTV EPG generated in {generation_time:.2f}s ({len(xml_content)} bytes)")
+        def generate():
+            """Yield the XMLTV document channel by channel (iterated in Starlette's threadpool)."""
+            yield "".join(xml_parts)
+            
+            yield _build_xmltv_channels(channels, base_url)
+            
+            for channel in channels:
+                try:
+                    programmes = channel_programmes(channel)
+                except Exception as e:
+                    # Skip this channel's listings instead of aborting the whole stream
+                    logger.error(f"Error generating XMLTV programmes for channel {channel.number}: {e}", exc_info=True)
+                    continue
+                yield programmes
+            
+            yield '</tv>\n'
+            
+            generation_time = time.time() - perf_start_time
+            logger.info(f"XMLTV EPG generated in {generation_time:.2f}s")
         
-        return Response(
-            content=xml_content,
+        return StreamingResponse(
+            _cache_stream(_EPG_CACHE, cache_key, generate(), _EPG_CACHE_TTL, _EPG_CACHE_MAX),
             media_type="application/xml; charset=utf-8",
             headers={
                 "Content-Disposition": "inline; filename=xmltv.xml",
                 "Cache-Control": "public, max-age=300",  # Cache for 5 minutes
                 "X-Generated-At": now.strftime("%Y-%m-%d %H:%M:%S UTC"),
-                "X-Generation-Time": f"{generation_time:.2f}s"
             }
         )
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Error generating XMLTV EPG: {e}", exc_info=True)
-        error_xml = '<?xml version="1.0" encoding="UTF-8"?>\n'
-        error_xml += '<tv generator-info-name="StreamTV">\n'
-        error_xml += f'  <error>{_xml(str(e))}</error>\n'
-        error_xml += '</tv>\n'
+        error_xml = "".join([
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            '<tv generator-info-name="StreamTV">\n',
+            f'  <error>{_xml(str(e))}</error>\n',
+            '</tv>\n',
+        ])
         return Response(
             content=error_xml,
             media_type="application/xml; charset=utf-8",
@@ -931,7 +1205,6 @@ async def get_hls_stream(
     
     # Query channel using raw SQL to avoid enum conversion issues
     from sqlalchemy import text
-    from ..database.models import StreamingMode
     
     channel = None
     try:
@@ -971,7 +1244,7 @@ async def get_hls_stream(
     if schedule_file:
         try:
             logger.info(f"Loading schedule from: {schedule_file}")
-            parsed_schedule = ScheduleParser.parse_file(schedule_file, schedule_file.parent)
+            parsed_schedule = _parsed_schedule(schedule_file)
             schedule_engine = ScheduleEngine(db)
             schedule_items = schedule_engine.generate_playlist_from_schedule(
                 channel, parsed_schedule, max_items=1000  # Limit to prevent huge playlists
@@ -984,21 +1257,25 @@ async def get_hls_stream(
     # Fallback to playlist if schedule not available or failed
     if not schedule_items:
         # Get active playlist for channel
-        playlists = db.query(Playlist).filter(Playlist.channel_id == channel.id).all()
-        if not playlists:
+        playlist = db.query(Playlist).filter(
+            Playlist.channel_id == channel.id
+        ).order_by(Playlist.id).first()  # Use first playlist
+        if not playlist:
             raise HTTPException(status_code=404, detail="No playlist found for channel")
         
-        playlist = playlists[0]  # Use first playlist
-        playlist_items = db.query(PlaylistItem).filter(
+        # Playlist items with their media items in one query (outer join so an
+        # item whose media item is gone still counts towards "not empty")
+        playlist_rows = db.query(PlaylistItem, MediaItem).outerjoin(
+            MediaItem, MediaItem.id == PlaylistItem.media_item_id
+        ).filter(
             PlaylistItem.playlist_id == playlist.id
         ).order_by(PlaylistItem.order).all()
         
-        if not playlist_items:
+        if not playlist_rows:
             raise HTTPException(status_code=404, detail="Playlist is empty")
         
         # Convert playlist items to schedule format
-        for item in playlist_items:
-            media_item = db.query(MediaItem).filter(MediaItem.id == item.media_item_id).first()
+        for _, media_item in playlist_rows:
             if media_item:
                 schedule_items.append({
                     'media_item': media_item,
@@ -1020,52 +1297,38 @@ async def get_hls_stream(
     # - Use current UTC time to find position within the repeating schedule
     # - Start the HLS playlist from the item that should be playing now
     #
-    now_utc = datetime.utcnow()
+    # Plain epoch-second arithmetic; no datetime objects are needed for the offset
+    now_ts = time.time()
     try:
-        creation_date_utc = channel.created_at.replace(tzinfo=None)
+        playout_start_ts = calendar.timegm(channel.created_at.date().timetuple())
     except Exception:
-        creation_date_utc = now_utc
-    playout_start_time = datetime.combine(creation_date_utc.date(), dt_time.min)
+        playout_start_ts = now_ts - now_ts % 86400  # Midnight UTC today
     
-    elapsed_since_start = (now_utc - playout_start_time).total_seconds()
-    if elapsed_since_start < 0:
-        elapsed_since_start = 0
+    elapsed_since_start = max(now_ts - playout_start_ts, 0)
     
-    # Total duration of one full schedule loop
+    # Total duration of one full schedule loop, plus the cumulative end offset of
+    # each item within it (items without a media_item take no time). The longest
+    # item is tracked in the same pass for the playlist target duration.
     total_schedule_duration = 0
+    max_duration = 0
+    loop_offsets = []
     for item in schedule_items:
         media = item.get("media_item")
-        if not media:
-            continue
-        dur = media.duration or 1800  # Default 30 minutes if unknown
-        if dur <= 0:
-            dur = 1800
-        total_schedule_duration += dur
+        if media:
+            dur = media.duration or 1800  # Default 30 minutes if unknown
+            if dur > max_duration:
+                max_duration = dur
+            total_schedule_duration += dur if dur > 0 else 1800
+        loop_offsets.append(total_schedule_duration)
     
     # Fallback: if total duration is zero, start from the first item
     current_index = 0
     if total_schedule_duration > 0:
         loop_position = elapsed_since_start % total_schedule_duration
-        time_offset = 0.0
-        idx_candidate = 0
-        for idx, item in enumerate(schedule_items):
-            media = item.get("media_item")
-            if not media:
-                continue
-            dur = media.duration or 1800
-            if dur <= 0:
-                dur = 1800
-            
-            if time_offset + dur > loop_position:
-                idx_candidate = idx
-                break
-            time_offset += dur
-            idx_candidate = idx + 1
-        
-        if idx_candidate >= len(schedule_items):
-            idx_candidate = 0
-        
-        current_index = idx_candidate
+        # First item whose end offset lies past loop_position is playing now
+        current_index = bisect.bisect_right(loop_offsets, loop_position)
+        if current_index >= len(schedule_items):
+            current_index = 0
     
     # Reorder items so playlist starts from the live position
     if current_index > 0:
@@ -1090,113 +1353,80 @@ async def get_hls_stream(
     
     token_param = f"?access_token={access_token}" if access_token else ""
     
-    m3u8_content = "#EXTM3U\n"
-    m3u8_content += "#EXT-X-VERSION:3\n"
+    # The body only changes when the live item (current_index) advances, so it is
+    # cached per live position; entries for earlier positions are dropped on rebuild
+    cache_key = (channel_number, current_index, base_url, access_token)
+    cached = _cache_get(_HLS_CACHE, cache_key, _HLS_CACHE_TTL)
+    generated_at = cached[0] if cached else time.time()
+    # The generation time versions the body, so playlist/schedule edits picked up
+    # when the TTL'd entry is rebuilt also change the ETag
+    etag = f'W/"{channel_number}-{current_index}-{int(generated_at * 1000)}"'
+    # Polling clients that already hold this body get a header-only 304
+    if request and request.headers.get("If-None-Match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
     
-    # Calculate target duration (use max segment duration)
-    max_duration = 0
-    total_duration = 0
-    for schedule_item in ordered_items:
-        media_item = schedule_item['media_item']
-        if media_item:
-            duration = media_item.duration or 1800
-            max_duration = max(max_duration, duration)
-            total_duration += duration
+    if cached:
+        return Response(
+            content=cached[1],
+            media_type="application/vnd.apple.mpegurl",
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+    # Snapshot the keys: _cache_stream inserts from Starlette's threadpool
+    for stale_key in [key for key in list(_HLS_CACHE) if key[0] == channel_number and key[1] != current_index]:
+        _HLS_CACHE.pop(stale_key, None)
     
     # Target duration should be at least the longest segment
     target_duration = max(30, int(max_duration) + 1)
-    m3u8_content += f"#EXT-X-TARGETDURATION:{target_duration}\n"
-    # Use current_index as media sequence so players see this as a rolling playlist
-    m3u8_content += f"#EXT-X-MEDIA-SEQUENCE:{current_index}\n"
     
     # Treat this as an EVENT-like playlist (no ENDLIST) so it feels live.
     # We intentionally omit #EXT-X-PLAYLIST-TYPE to keep clients flexible.
     
-    # Add all schedule items in sequence with 100% metadata, starting from live position
-    for idx, schedule_item in enumerate(ordered_items):
-        media_item = schedule_item['media_item']
-        if media_item:
-            duration = media_item.duration or 1800
-            # Use custom title if available (ErsatzTV supports custom titles)
-            title = schedule_item.get('custom_title') or media_item.title
-            
-            # Build comprehensive metadata string for EXTINF
-            metadata_parts = [title]
-            
-            # Add ALL available metadata
-            if media_item.description:
-                desc = media_item.description[:200].replace('\n', ' ').replace('\r', ' ').replace(',', '\\,')
-                metadata_parts.append(f"Description: {desc}")
-            
-            if media_item.uploader:
-                metadata_parts.append(f"Uploader: {media_item.uploader}")
-            
-            if media_item.upload_date:
-                metadata_parts.append(f"Date: {media_item.upload_date}")
-            
-            if media_item.view_count:
-                metadata_parts.append(f"Views: {media_item.view_count}")
-            
-            if media_item.source_id:
-                metadata_parts.append(f"Source ID: {media_item.source_id}")
-            
-            if media_item.source:
-                metadata_parts.append(f"Source: {media_item.source.value}")
-            
-            # Parse and add meta_data JSON fields
-            if media_item.meta_data:
-                try:
-                    import json
-                    meta = json.loads(media_item.meta_data)
-                    for key, value in meta.items():
-                        if value and str(value) not in ['None', 'null', '']:
-                            value_str = str(value)[:100].replace(',', '\\,')
-                            metadata_parts.append(f"{key}: {value_str}")
-                except:
-                    pass
-            
-            # Combine all metadata (escape commas for M3U8)
-            full_metadata = " | ".join(metadata_parts).replace('\n', ' ').replace('\r', ' ')
-            
-            m3u8_content += f"#EXTINF:{duration:.3f},{full_metadata}\n"
-            
-            # Add custom metadata tags (some players support these)
-            m3u8_content += f"#EXT-X-METADATA:SOURCE={media_item.source.value}\n"
-            if media_item.uploader:
-                m3u8_content += f"#EXT-X-METADATA:UPLOADER={media_item.uploader.replace(',', '\\,')}\n"
-            if media_item.upload_date:
-                m3u8_content += f"#EXT-X-METADATA:UPLOAD_DATE={media_item.upload_date}\n"
-            if media_item.thumbnail:
-                m3u8_content += f"#EXT-X-METADATA:THUMBNAIL={media_item.thumbnail}\n"
-            if media_item.view_count:
-                m3u8_content += f"#EXT-X-METADATA:VIEW_COUNT={media_item.view_count}\n"
-            if media_item.source_id:
-                m3u8_content += f"#EXT-X-METADATA:SOURCE_ID={media_item.source_id}\n"
-            
-            # Stream URL points to the actual media stream
-            # For direct HLS URLs (like PBS streams), use MPEG-TS endpoint instead
-            # Browsers cannot play DRM-protected HLS streams directly, so we need to transcode
-            # However, include the original URL as a comment for the web player to use if possible
-            if media_item.url and '.m3u8' in media_item.url.lower():
-                # Direct HLS stream - use MPEG-TS endpoint for browser compatibility
-                # The MPEG-TS endpoint will transcode the HLS stream for browser playback
-                # Include original URL as comment for web player
-                original_url = media_item.url
-                m3u8_content += f"#EXT-X-ORIGINAL-URL:{original_url}\n"
-                stream_url = f"{base_url}/iptv/channel/{channel.number}.ts{token_param}"
-                logger.debug(f"Using MPEG-TS endpoint for HLS stream (media {media_item.id}), original URL: {original_url}")
-            else:
-                # Non-HLS stream - proxy through StreamTV endpoint
-                stream_url = f"{base_url}/iptv/stream/{media_item.id}{token_param}"
-            m3u8_content += f"{stream_url}\n"
+    # Loop-invariant stream URL parts
+    transport_stream_url = f"{base_url}/iptv/channel/{channel.number}.ts{token_param}"
+    media_stream_prefix = f"{base_url}/iptv/stream/"
     
-    # Mark end of playlist (VOD type)
-    # Note: For live streaming, ErsatzTV would omit this and update the playlist dynamically
-    m3u8_content += "#EXT-X-ENDLIST\n"
-    
-    logger.info(f"Generated HLS playlist with {len(schedule_items)} items (total duration: {total_duration}s)")
+    def generate():
+        """Yield the playlist header, then one chunk per schedule item (iterated in Starlette's threadpool)."""
+        # Use current_index as media sequence so players see this as a rolling playlist
+        yield (
+            "#EXTM3U\n"
+            "#EXT-X-VERSION:3\n"
+            f"#EXT-X-TARGETDURATION:{target_duration}\n"
+            f"#EXT-X-MEDIA-SEQUENCE:{current_index}\n"
+        )
+        
+        # Add all schedule items in sequence with 100% metadata, starting from live position
+        for schedule_item in ordered_items:
+            media_item = schedule_item['media_item']
+            if media_item:
+                # Use custom title if available (ErsatzTV supports custom titles)
+                title = schedule_item.get('custom_title') or media_item.title
+                lines, is_hls = _hls_item_lines(media_item, title)
+                
+                # Stream URL points to the actual media stream
+                # For direct HLS URLs (like PBS streams), use MPEG-TS endpoint instead
+                # Browsers cannot play DRM-protected HLS streams directly, so we need to transcode
+                if is_hls:
+                    # Direct HLS stream - use MPEG-TS endpoint for browser compatibility
+                    # The MPEG-TS endpoint will transcode the HLS stream for browser playback
+                    stream_url = transport_stream_url
+                    logger.debug("Using MPEG-TS endpoint for HLS stream (media %s), original URL: %s", media_item.id, media_item.url)
+                else:
+                    # Non-HLS stream - proxy through StreamTV endpoint
+                    stream_url = f"{media_stream_prefix}{media_item.id}{token_param}"
+                yield f"{lines}{stream_url}\n"
+        
+        # Mark end of playlist (VOD type)
+        # Note: For live streaming, ErsatzTV would omit this and update the playlist dynamically
+        yield "#EXT-X-ENDLIST\n"
+        
+        logger.info(f"Generated HLS playlist with {len(schedule_items)} items (total duration: {total_schedule_duration}s)")
     
-    return Response(content=m3u8_content, media_type="application/vnd.apple.mpegurl")
+    return StreamingResponse(
+        _cache_stream(_HLS_CACHE, cache_key, generate(), _HLS_CACHE_TTL, _HLS_CACHE_MAX, generated_at),
+        media_type="application/vnd.apple.mpegurl",
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
 
 
 @router.get("/iptv/channel/{channel_number}.ts")
@@ -1224,7 +1454,6 @@ async def get_transport_stream(
     
     # Query channel using raw SQL to avoid enum conversion issues
     from sqlalchemy import text
-    from ..database.models import StreamingMode
     
     channel = None
     try:
@@ -1424,53 +1653,8 @@ async def stream_media(
                 except ValueError:
                     end = None
         
-        # Get content length and type from upstream
-        content_length = None
-        upstream_content_type = "video/mp4"
-        
-        try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Try HEAD request first
-                try:
-                    # Follow redirects and validate the stream URL
-                    head_response = await client.head(stream_url, follow_redirects=True, timeout=10.0)
-                    
-                    # If redirected, use the final URL
-                    if head_response.status_code in [301, 302, 303, 307, 308]:
-                        redirect_url = head_response.headers.get('Location')
-                        if redirect_url:
-                            if redirect_url.startswith('/'):
-                                from urllib.parse import urlparse
-                                parsed = urlparse(stream_url)
-                                redirect_url = f"{parsed.scheme}://{parsed.netloc}{redirect_url}"
-                            stream_url = redirect_url
-                            logger.info(f"Stream URL redirected to: {stream_url}")
-                            # Re-validate the redirected URL
-                            head_response = await client.head(stream_url, follow_redirects=True, timeout=10.0)
-                    content_length = head_response.headers.get("Content-Length")
-                    upstream_content_type = head_response.headers.get("Content-Type", "video/mp4")
-                except:
-                    pass
-                
-                # If HEAD doesn't work or no Content-Length, try a small range request
-                if not content_length:
-                    try:
-                        range_headers = {"Range": "bytes=0-1023"}
-                        test_response = await client.get(stream_url, headers=range_headers, follow_redirects=True, timeout=10.0)
-                        content_range = test_response.headers.get("Content-Range")
-                        if content_range:
-                            # Extract total from "bytes 0-1023/1234567"
-                            if "/" in content_range:
-                                content_length = content_range.split("/")[-1]
-                        if not content_length:
-                            content_length = test_response.headers.get("Content-Length")
-                        if not upstream_content_type or upstream_content_type == "application/octet-stream":
-                            upstream_content_type = test_response.headers.get("Content-Type", "video/mp4")
-                    except:
-                        pass
-        except Exception as e:
-            logger.warning(f"Could not determine content length: {e}")
-            # Continue without content length - browser will handle it
+        # Get content length and type from upstream (shared across requests for the same URL)
+        content_length, upstream_content_type, stream_url = await _probe_stream(stream_url)
         
         # Determine content type
         content_type = upstream_content_type
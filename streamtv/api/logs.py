@@ -10,9 +10,11 @@ import logging
 import re
 import json
 import asyncio
+import functools
 import os
 import platform
-from typing import List, Dict, Optional
+import time
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -24,90 +26,120 @@ BASE_DIR = Path(__file__).parent.parent.parent
 TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
-# Error patterns to match troubleshooting scripts
+# Resolved log locations are reused for a short while instead of probing the
+# candidate paths on every request; keyed on the configured value
+_PATH_CACHE_TTL = 30
+_path_cache: Dict[str, Tuple[float, Optional[str], Optional[Path]]] = {}
+
+# Log entries per SSE event / per chunk of a streamed entries response
+LOG_BATCH_SIZE = 100
+
+# Padded standard base64, as produced by btoa() for log entry links
+BASE64_RE = re.compile(r'(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?')
+
+# How far back from the end of the log the entry detail page looks for its line
+DETAIL_SEARCH_LINES = 10000
+
+# Error patterns to match troubleshooting scripts. Gaps between keywords are
+# bounded rather than ".*" so long lines (stack traces, JSON) cannot trigger
+# quadratic backtracking.
+_GAP = r"[^\n]{0,200}?"
 ERROR_PATTERNS = {
     "check_python": [
-        r"python.*not found",
-        r"python.*error",
-        r"python.*exception",
+        rf"python{_GAP}(?:not found|error|exception|version|install)",
         r"no module named",
-        r"import.*error",
-        r"python.*version",
-        r"python.*install"
+        rf"import{_GAP}error"
     ],
     "check_ffmpeg": [
-        r"ffmpeg.*not found",
-        r"ffmpeg.*error",
-        r"ffmpeg.*exception",
-        r"ffmpeg.*failed",
-        r"ffmpeg.*missing",
-        r"codec.*not found",
-        r"encoder.*not found"
+        rf"ffmpeg{_GAP}(?:not found|error|exception|failed|missing)",
+        rf"(?:codec|encoder){_GAP}not found"
     ],
     "check_database": [
-        r"database.*error",
-        r"database.*exception",
-        r"sql.*error",
-        r"database.*connection",
-        r"database.*locked",
-        r"database.*corrupt",
-        r"sqlite.*error"
+        rf"database{_GAP}(?:error|exception|connection|locked|corrupt)",
+        rf"(?:sql|sqlite){_GAP}error"
     ],
     "check_ports": [
-        r"port.*in use",
-        r"port.*already",
-        r"address.*already",
-        r"connection.*refused",
-        r"cannot.*bind",
-        r"port.*unavailable"
+        rf"port{_GAP}(?:in use|already|unavailable)",
+        rf"address{_GAP}already",
+        rf"connection{_GAP}refused",
+        rf"cannot{_GAP}bind"
     ],
     "test_connectivity": [
-        r"connection.*timeout",
-        r"connection.*refused",
-        r"network.*error",
-        r"dns.*error",
-        r"host.*unreachable",
-        r"failed.*connect",
-        r"youtube.*error",
-        r"archive\.org.*error",
-        r"nodename.*not known",
-        r"servname.*not known",
+        rf"connection{_GAP}(?:timeout|refused)",
+        rf"(?:network|dns|youtube|archive\.org|transport){_GAP}error",
+        rf"(?:host|network){_GAP}unreachable",
+        rf"failed{_GAP}connect",
+        rf"(?:nodename|servname){_GAP}not known",
         r"name resolution",
         r"unable to resolve",
-        r"network.*unreachable",
-        r"errno.*8",
-        r"transport.*error"
+        rf"errno{_GAP}8"
     ],
     "repair_database": [
-        r"database.*corrupt",
-        r"database.*integrity",
-        r"database.*repair",
-        r"sqlite.*corrupt"
+        rf"database{_GAP}(?:corrupt|integrity|repair)",
+        rf"sqlite{_GAP}corrupt"
     ],
     "clear_cache": [
-        r"cache.*error",
-        r"cache.*full",
-        r"cache.*corrupt",
-        r"memory.*error"
+        rf"cache{_GAP}(?:error|full|corrupt)",
+        rf"memory{_GAP}error"
     ]
 }
 
+# One case-insensitive alternation per script, compiled once at import
+COMPILED_ERROR_PATTERNS: Dict[str, re.Pattern] = {
+    script_id: re.compile("|".join(f"(?:{pattern})" for pattern in patterns), re.IGNORECASE)
+    for script_id, patterns in ERROR_PATTERNS.items()
+}
+
+# Every pattern of every script in one scan; most messages match none of them
+ANY_ERROR_PATTERN = re.compile(
+    "|".join(f"(?:{pattern})" for patterns in ERROR_PATTERNS.values() for pattern in patterns),
+    re.IGNORECASE
+)
+
 def match_error_to_scripts(error_message: str) -> List[str]:
     """Match an error message to appropriate troubleshooting scripts"""
-    error_lower = error_message.lower()
-    matched_scripts = []
-    
-    for script_id, patterns in ERROR_PATTERNS.items():
-        for pattern in patterns:
-            if re.search(pattern, error_lower, re.IGNORECASE):
-                if script_id not in matched_scripts:
-                    matched_scripts.append(script_id)
-                break
-    
-    return matched_scripts
+    if not ANY_ERROR_PATTERN.search(error_message):
+        return []
+    return [script_id for script_id, pattern in COMPILED_ERROR_PATTERNS.items() if pattern.search(error_message)]
+
+# "2024-11-30 14:30:45[,123] - logger.name - LEVEL - message"; the message keeps
+# its "LEVEL - " prefix, matching the split-based parsing
+LOG_LINE_RE = re.compile(
+    r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:[.,]\d+)? - '
+    r'(?!(?:DEBUG|INFO|WARNING|ERROR|CRITICAL) )(\S+) - '
+    r'(DEBUG|INFO|WARNING|ERROR|CRITICAL) - '
+)
+
+# Step-by-step parsing for lines that do not match LOG_LINE_RE
+TIMESTAMP_RE = re.compile(r'(\d{4}-\d{2}-\d{2}[\s,]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)')
+LEVEL_RE = re.compile(r'\s-\s(DEBUG|INFO|WARNING|ERROR|CRITICAL)\s-')
+
+# Fallback error detection for lines without a recognised level
+ERROR_WORD_RE = re.compile(r'error|exception', re.IGNORECASE)
+
+# "[2024-01-01 12:00:00.000] LEVEL - message"
+PLEX_LOG_LINE_RE = re.compile(
+    r'\[(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}(?:\.\d+)?)\]\s*'
+    r'(ERROR|WARN|WARNING|INFO|DEBUG|CRITICAL|FATAL)\b\s*-\s*'
+)
+
+# Step-by-step parsing for Plex lines that do not match PLEX_LOG_LINE_RE
+PLEX_TIMESTAMP_RE = re.compile(r'\[(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}(?:\.\d+)?)\]')
+PLEX_LEVEL_RE = re.compile(r'\b(ERROR|WARN|WARNING|INFO|DEBUG|CRITICAL|FATAL)\b')
+PLEX_LEVEL_PREFIX_RE = re.compile(r'\b(ERROR|WARN|WARNING|INFO|DEBUG|CRITICAL|FATAL)\b\s*-\s*')
+
+_LOG_ENTRY_FIELDS = ("raw", "timestamp", "level", "logger", "message", "is_error", "matched_scripts")
 
 def parse_log_line(line: str) -> Dict:
     """Parse a log line and extract information"""
+    # Callers may mutate the dict, so hand out a fresh copy of the cached fields
+    entry = dict(zip(_LOG_ENTRY_FIELDS, _parse_log_line_cached(line)))
+    entry["matched_scripts"] = list(entry["matched_scripts"])
+    return entry
+
+@functools.lru_cache(maxsize=4096)
+def _parse_log_line_cached(line: str) -> tuple:
+    """Parse a log line into a tuple of _LOG_ENTRY_FIELDS (repeated lines are common)"""
     # Common log formats:
     # 2024-11-30 14:30:45 - streamtv.api.iptv - ERROR - Error message
     # 2024-11-30 14:30:45,123 - streamtv.api.iptv - ERROR - Error message
@@ -117,48 +149,116 @@ def parse_log_line(line: str) -> Dict:
     logger_name = None
     message = line
     
-    # Try to parse timestamp and level
-    timestamp_match = re.match(r'(\d{4}-\d{2}-\d{2}[\s,]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)', line)
-    if timestamp_match:
-        timestamp_str = timestamp_match.group(1).replace(',', '.')
+    # Our own format is handled by a single match; anything else goes through
+    # the more lenient step-by-step parsing below
+    line_match = LOG_LINE_RE.match(line)
+    if line_match:
         try:
-            timestamp = datetime.strptime(timestamp_str.split('.')[0], '%Y-%m-%d %H:%M:%S')
-        except:
+            timestamp = datetime.fromisoformat(line_match.group(1))
+        except ValueError:
             pass
-    
-    # Try to extract log level
-    level_match = re.search(r'\s-\s(DEBUG|INFO|WARNING|ERROR|CRITICAL)\s-', line)
-    if level_match:
-        level = level_match.group(1)
-        # Extract logger name (between timestamp and level)
-        parts = line.split(' - ')
-        if len(parts) >= 3:
-            logger_name = parts[1] if len(parts) > 1 else None
-            message = ' - '.join(parts[2:]) if len(parts) > 2 else line
-    
-    # Check if it's an error
-    is_error = level in ['ERROR', 'CRITICAL'] or 'error' in line.lower() or 'exception' in line.lower()
+        logger_name = line_match.group(2)
+        level = line_match.group(3)
+        message = line[line_match.start(3):]
+    else:
+        # Try to parse timestamp and level
+        timestamp_match = TIMESTAMP_RE.match(line)
+        if timestamp_match:
+            timestamp_str = timestamp_match.group(1).replace(',', '.').split('.')[0]
+            try:
+                # Only a full date and time (19 chars); fromisoformat would also take a bare date
+                if len(timestamp_str) == 19:
+                    timestamp = datetime.fromisoformat(timestamp_str)
+            except ValueError:
+                pass
+        
+        # Try to extract log level
+        level_match = LEVEL_RE.search(line)
+        if level_match:
+            level = level_match.group(1)
+            # Extract logger name (between timestamp and level)
+            parts = line.split(' - ')
+            if len(parts) >= 3:
+                logger_name = parts[1] if len(parts) > 1 else None
+                message = ' - '.join(parts[2:]) if len(parts) > 2 else line
+    
+    # Check if it's an error: trust the level when the line has one, otherwise look
+    # for error words (without building a lowercased copy of the line)
+    if level:
+        is_error = level in ('ERROR', 'CRITICAL')
+    else:
+        is_error = ERROR_WORD_RE.search(line) is not None
     
     # Match to troubleshooting scripts if it's an error
     matched_scripts = []
     if is_error:
         matched_scripts = match_error_to_scripts(message)
     
-    return {
-        "raw": line,
-        "timestamp": timestamp,
-        "level": level or "INFO",
-        "logger": logger_name,
-        "message": message,
-        "is_error": is_error,
-        "matched_scripts": matched_scripts
-    }
+    return (line, timestamp, level or "INFO", logger_name, message, is_error, tuple(matched_scripts))
+
+
+def _json_default(value):
+    """Serialise parsed timestamps the way the JSON endpoints do"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# json.dumps builds a new encoder per call when given options; reuse one instead
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=_json_default)
+
+
+def tail_lines(path: Path, n: int, block: int = 65536) -> List[str]:
+    """Return the last n lines of a file, reading backwards in blocks instead of the whole file"""
+    return [line.decode('utf-8', errors='ignore') for line in tail_raw_lines(path, n, block)]
+
+
+def tail_raw_lines(path: Path, n: int, block: int = 65536) -> List[bytes]:
+    """Return the last n lines of a file as undecoded bytes"""
+    if n <= 0:
+        return []
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        chunks = []
+        newlines = 0
+        # n + 1 newlines guarantee n complete lines after the first (possibly partial) one
+        while position > 0 and newlines <= n:
+            step = min(block, position)
+            position -= step
+            f.seek(position)
+            chunk = f.read(step)
+            chunks.append(chunk)
+            newlines += chunk.count(b"\n")
+    return b"".join(reversed(chunks)).splitlines()[-n:]
+
+
+def _level_token(filter_level: Optional[str]) -> Optional[bytes]:
+    """Bytes a raw line must contain to parse to filter_level, or None if any line can"""
+    # Lines without a recognised level default to INFO, so INFO cannot be prefiltered
+    if not filter_level or filter_level == "INFO":
+        return None
+    # Plex writes WARN as well as WARNING; both parse to WARNING
+    return b"WARN" if filter_level == "WARNING" else filter_level.encode()
+
+
+def _cached_path(kind: str, configured: Optional[str], resolve) -> Optional[Path]:
+    """Return a resolved log location, resolving again when stale or when the config changed"""
+    now = time.monotonic()
+    cached = _path_cache.get(kind)
+    if cached and cached[1] == configured and now - cached[0] < _PATH_CACHE_TTL:
+        return cached[2]
+    path = resolve(configured)
+    _path_cache[kind] = (now, configured, path)
+    return path
+
 
 def get_log_file_path() -> Path:
     """Get the log file path from config, with fallbacks"""
     from ..config import config
-    log_file = config.logging.file
-    
+    return _cached_path("log_file", config.logging.file, _find_log_file_path)
+
+
+def _find_log_file_path(log_file: str) -> Path:
+    """Probe the possible log file locations"""
     # List of possible log file locations to check
     possible_paths = []
     
@@ -188,18 +288,8 @@ def get_log_file_path() -> Path:
     return BASE_DIR / log_file
 
 
-def get_plex_logs_directory() -> Optional[Path]:
-    """Get Plex Media Server logs directory, auto-detecting based on OS if not configured"""
-    from ..config import config
-    
-    # If explicitly configured, use that
-    if config.plex.logs_path:
-        path = Path(config.plex.logs_path)
-        if path.exists():
-            return path
-        logger.warning(f"Configured Plex logs path does not exist: {path}")
-    
-    # Auto-detect based on OS
+def _plex_log_candidates() -> List[Path]:
+    """Default Plex Media Server logs locations for this OS"""
     system = platform.system()
     home = Path.home()
     
@@ -212,7 +302,6 @@ def get_plex_logs_directory() -> Optional[Path]:
         ]
     elif system == "Linux":
         possible_paths = [
-            Path("/var/lib/plexmediaserver/Library/Application Support/Plex Media Server/Logs"),
             Path("/var/lib/plexmediaserver/Library/Application Support/Plex Media Server/Logs"),
             home / ".local" / "share" / "Plex Media Server" / "Logs",
             Path("/opt/plexmediaserver/Library/Application Support/Plex Media Server/Logs"),
@@ -228,9 +317,32 @@ def get_plex_logs_directory() -> Optional[Path]:
             Path("C:/Users") / os.getenv("USERNAME", "") / "AppData" / "Local" / "Plex Media Server" / "Logs",
         ])
     
-    # Check each possible path
-    for path in possible_paths:
-        if path.exists() and path.is_dir():
+    return possible_paths
+
+
+# The OS, home directory and environment do not change while running
+_PLEX_LOG_CANDIDATES = _plex_log_candidates()
+
+
+def get_plex_logs_directory() -> Optional[Path]:
+    """Get Plex Media Server logs directory, auto-detecting based on OS if not configured"""
+    from ..config import config
+    # A miss (None) is cached too, so installs without Plex do not rescan every request
+    return _cached_path("plex_logs", config.plex.logs_path, _find_plex_logs_directory)
+
+
+def _find_plex_logs_directory(logs_path: Optional[str]) -> Optional[Path]:
+    """Probe the configured and OS-specific Plex logs locations"""
+    # If explicitly configured, use that
+    if logs_path:
+        path = Path(logs_path)
+        if path.exists():
+            return path
+        logger.warning(f"Configured Plex logs path does not exist: {path}")
+    
+    # Auto-detect based on OS
+    for path in _PLEX_LOG_CANDIDATES:
+        if path.is_dir():
             logger.info(f"Found Plex logs directory: {path}")
             return path
     
@@ -238,22 +350,29 @@ def get_plex_logs_directory() -> Optional[Path]:
     return None
 
 
-def get_plex_log_files() -> List[Path]:
-    """Get list of Plex log files, sorted by modification time (newest first)"""
+def get_plex_log_file_stats() -> List[Tuple[Path, os.stat_result]]:
+    """Get Plex log files with their stat results, sorted by modification time (newest first)"""
     logs_dir = get_plex_logs_directory()
     if not logs_dir:
         return []
     
+    # One scandir pass; each entry is stat'ed once and the result reused by callers
     log_files = []
-    for file in logs_dir.iterdir():
-        if file.is_file() and (file.suffix == '.log' or 'Plex Media Server' in file.name):
-            log_files.append(file)
+    with os.scandir(logs_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and (os.path.splitext(entry.name)[1] == '.log' or 'Plex Media Server' in entry.name):
+                log_files.append((Path(entry.path), entry.stat()))
     
     # Sort by modification time, newest first
-    log_files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+    log_files.sort(key=lambda item: item[1].st_mtime, reverse=True)
     return log_files
 
 
+def get_plex_log_files() -> List[Path]:
+    """Get list of Plex log files, sorted by modification time (newest first)"""
+    return [path for path, _ in get_plex_log_file_stats()]
+
+
 def parse_plex_log_line(line: str) -> Dict:
     """Parse a Plex log line into structured data"""
     # Plex log format: [timestamp] LEVEL - message
@@ -267,40 +386,86 @@ def parse_plex_log_line(line: str) -> Dict:
         "is_error": False
     }
     
-    # Try to extract timestamp and level
-    timestamp_match = re.match(r'\[(\d{4}-\d{2}-\d{2}\s+\d{2}:\d{2}:\d{2}(?:\.\d+)?)\]', line)
+    # "[timestamp] LEVEL - message" is handled by a single match
+    line_match = PLEX_LOG_LINE_RE.match(line)
+    timestamp_match = line_match or PLEX_TIMESTAMP_RE.match(line)
     if timestamp_match:
         try:
             timestamp_str = timestamp_match.group(1)
-            # Parse timestamp (handle with or without microseconds)
-            if '.' in timestamp_str:
-                parsed["timestamp"] = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f").isoformat()
-            else:
-                parsed["timestamp"] = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S").isoformat()
+            # fromisoformat is implemented in C; strptime is only needed for odd
+            # spacing or, on Python < 3.11, fractions that are not 3 or 6 digits
+            try:
+                timestamp = datetime.fromisoformat(timestamp_str)
+            except ValueError:
+                # Parse timestamp (handle with or without microseconds)
+                if '.' in timestamp_str:
+                    timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S.%f")
+                else:
+                    timestamp = datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S")
+            parsed["timestamp"] = timestamp.isoformat()
         except ValueError:
             pass
     
     # Extract log level
-    level_match = re.search(r'\b(ERROR|WARN|WARNING|INFO|DEBUG|CRITICAL|FATAL)\b', line)
+    if line_match:
+        level_match = line_match
+        level = line_match.group(2)
+    else:
+        level_match = PLEX_LEVEL_RE.search(line)
+        level = level_match.group(1).upper() if level_match else None
     if level_match:
-        level = level_match.group(1).upper()
         if level == "WARN":
             level = "WARNING"
         parsed["level"] = level
         parsed["is_error"] = level in ["ERROR", "CRITICAL", "FATAL"]
     
     # Extract message (everything after timestamp and level)
-    if timestamp_match:
+    if line_match:
+        parsed["message"] = line[line_match.end():].rstrip()
+    elif timestamp_match:
         remaining = line[timestamp_match.end():].strip()
         # Remove level if present
         if level_match:
-            remaining = re.sub(r'\b(ERROR|WARN|WARNING|INFO|DEBUG|CRITICAL|FATAL)\b\s*-\s*', '', remaining, count=1)
+            remaining = PLEX_LEVEL_PREFIX_RE.sub('', remaining, count=1)
         parsed["message"] = remaining
     else:
         parsed["message"] = line
     
     return parsed
 
+def _read_context(log_file: Path, target: str) -> Tuple[Optional[int], List[Dict]]:
+    """Find target in the log and return its index with 20 lines of context either side"""
+    # Entries are picked from the recent end of the log, so only that is searched
+    all_lines = tail_lines(log_file, DETAIL_SEARCH_LINES)
+    
+    # Find the line index (first match; list.index compares in C)
+    stripped = [line.strip() for line in all_lines]
+    try:
+        i = stripped.index(target.strip())
+    except ValueError:
+        return None, []
+    
+    # Get 20 lines before and after for context. Lines are numbered within the
+    # searched tail (the whole file when it is shorter than DETAIL_SEARCH_LINES),
+    # since numbering from the start of a large log would mean reading all of it
+    start = max(0, i - 20)
+    end = min(len(stripped), i + 21)
+    context_lines = [
+        {
+            "line_number": j + 1,
+            "content": stripped[j],
+            "is_target": j == i,
+            "parsed": parse_log_line(stripped[j])
+        }
+        for j in range(start, end)
+    ]
+    return i, context_lines
+
+@functools.lru_cache(maxsize=256)
+def _read_context_cached(log_path: str, mtime_ns: int, target: str) -> Tuple[Optional[int], List[Dict]]:
+    """_read_context memoised per log file version, so revisiting an entry skips the file read"""
+    return _read_context(Path(log_path), target)
+
 # Note: The /logs page route is handled in main.py to avoid conflicts
 
 @router.get("/logs/{entry_id}", response_class=HTMLResponse)
@@ -309,57 +474,43 @@ async def log_entry_detail(entry_id: str, request: Request):
     import base64
     import urllib.parse
     
+    # Decode entry_id (it's base64 encoded log line); reject malformed ids up front
+    if not BASE64_RE.fullmatch(entry_id):
+        raise HTTPException(status_code=400, detail="Invalid log entry ID")
     try:
-        # Decode entry_id (it's base64 encoded log line)
         decoded = base64.b64decode(entry_id).decode('utf-8')
-        
-        # Parse the log entry
-        parsed = parse_log_line(decoded)
-        
-        # Get surrounding context (lines before and after)
-        log_file = get_log_file_path()
-        context_lines = []
-        target_line_index = None
-        
-        if log_file.exists():
-            try:
-                with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    all_lines = f.readlines()
-                    
-                    # Find the line index
-                    for i, line in enumerate(all_lines):
-                        if line.strip() == decoded.strip():
-                            target_line_index = i
-                            # Get 20 lines before and after for context
-                            start = max(0, i - 20)
-                            end = min(len(all_lines), i + 21)
-                            context_lines = [
-                                {
-                                    "line_number": j + 1,
-                                    "content": all_lines[j].strip(),
-                                    "is_target": j == i,
-                                    "parsed": parse_log_line(all_lines[j].strip())
-                                }
-                                for j in range(start, end)
-                            ]
-                            break
-            except Exception as e:
-                logger.error(f"Error reading context: {e}")
-        
-        return templates.TemplateResponse(
-            "log_detail.html",
-            {
-                "request": request,
-                "title": f"Log Entry Detail - {parsed.get('level', 'INFO')}",
-                "entry": parsed,
-                "raw_line": decoded,
-                "context_lines": context_lines,
-                "target_line_index": target_line_index
-            }
-        )
-    except Exception as e:
+    except ValueError as e:
         logger.error(f"Error decoding log entry: {e}")
         raise HTTPException(status_code=400, detail="Invalid log entry ID")
+    
+    # Parse the log entry
+    parsed = parse_log_line(decoded)
+    
+    # Get surrounding context (lines before and after)
+    log_file = get_log_file_path()
+    context_lines = []
+    target_line_index = None
+    
+    if log_file.exists():
+        try:
+            mtime_ns = log_file.stat().st_mtime_ns
+            target_line_index, context_lines = await asyncio.to_thread(
+                _read_context_cached, str(log_file), mtime_ns, decoded
+            )
+        except Exception as e:
+            logger.error(f"Error reading context: {e}")
+    
+    return templates.TemplateResponse(
+        "log_detail.html",
+        {
+            "request": request,
+            "title": f"Log Entry Detail - {parsed.get('level', 'INFO')}",
+            "entry": parsed,
+            "raw_line": decoded,
+            "context_lines": context_lines,
+            "target_line_index": target_line_index
+        }
+    )
 
 @router.get("/api/logs/entries")
 async def get_log_entries(lines: int = 500, filter_level: Optional[str] = None):
@@ -409,31 +560,39 @@ async def get_log_entries(lines: int = 500, filter_level: Optional[str] = None):
             }
     
     try:
-        # Read last N lines
-        with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-            all_lines = f.readlines()
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-        
-        # Parse lines
-        entries = []
-        for line in recent_lines:
-            parsed = parse_log_line(line.strip())
-            if filter_level and parsed["level"] != filter_level:
-                continue
-            entries.append(parsed)
-        
-        return {
-            "entries": entries,
-            "total_lines": len(all_lines),
-            "showing": len(entries)
-        }
+        # Read last N lines (off the event loop; logs can sit on slow disks)
+        recent_lines = await asyncio.to_thread(tail_raw_lines, log_file, lines)
     except Exception as e:
         logger.error(f"Error reading log file: {e}")
         raise HTTPException(status_code=500, detail=f"Error reading log file: {str(e)}")
+    
+    def generate():
+        """Yield the entries array as lines are parsed (iterated in Starlette's threadpool)"""
+        yield '{"entries":['
+        parts = []
+        showing = 0
+        level_token = _level_token(filter_level)
+        for line in recent_lines:
+            # Lines that cannot match the level filter are skipped before decoding
+            if level_token and level_token not in line:
+                continue
+            parsed = parse_log_line(line.decode('utf-8', errors='ignore').strip())
+            if filter_level and parsed["level"] != filter_level:
+                continue
+            parts.append(("," if showing else "") + _JSON_ENCODER.encode(parsed))
+            showing += 1
+            if len(parts) >= LOG_BATCH_SIZE:
+                yield "".join(parts)
+                parts = []
+        parts.append(f'],"total_lines":{len(recent_lines)},"showing":{showing}}}')
+        yield "".join(parts)
+    
+    # Same document as before, streamed instead of built as one list of entries
+    return StreamingResponse(generate(), media_type="application/json")
 
 @router.get("/api/logs/stream")
 async def stream_logs():
-    """Stream logs in real-time (SSE)"""
+    """Stream logs in real-time (SSE); each event carries a JSON array of entries"""
     log_file = get_log_file_path()
     
     if not log_file.exists():
@@ -441,31 +600,53 @@ async def stream_logs():
             yield f"data: {json.dumps({'error': f'Log file not found at: {log_file}', 'log_path': str(log_file)})}\n\n"
         return StreamingResponse(error_generator(), media_type="text/event-stream")
     
+    def open_log():
+        """Open the log positioned at its end (runs in a worker thread)"""
+        f = open(log_file, 'r', encoding='utf-8', errors='ignore')
+        f.seek(0, 2)  # Seek to end
+        return f, f.tell()
+    
+    def read_new_lines(f, position: int):
+        """Read lines appended since position on the open handle (runs in a worker thread)"""
+        current = os.stat(log_file)
+        if current.st_ino != os.fstat(f.fileno()).st_ino:
+            # Rotated: follow the new file from its start
+            rotated = open(log_file, 'r', encoding='utf-8', errors='ignore')
+            f.close()
+            f = rotated
+            position = 0
+        elif current.st_size < position:
+            # Truncated (e.g. cleared): start over
+            position = 0
+        f.seek(position)
+        return f, f.readlines(), f.tell()
+    
     async def log_generator():
-        import time
-        import json
-        
-        # Read existing logs first
-        with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-            f.seek(0, 2)  # Seek to end
-            last_position = f.tell()
+        # Keep one handle open for the life of the stream, starting at the current end
+        log_handle, last_position = await asyncio.to_thread(open_log)
         
-        while True:
-            try:
-                with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                    f.seek(last_position)
-                    new_lines = f.readlines()
-                    last_position = f.tell()
+        try:
+            while True:
+                try:
+                    log_handle, new_lines, last_position = await asyncio.to_thread(
+                        read_new_lines, log_handle, last_position
+                    )
                     
-                    for line in new_lines:
-                        if line.strip():
-                            parsed = parse_log_line(line.strip())
-                            yield f"data: {json.dumps(parsed)}\n\n"
-                
-                await asyncio.sleep(0.5)  # Check every 500ms
-            except Exception as e:
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
-                await asyncio.sleep(1)
+                    # Everything read in one wake-up goes out as JSON arrays of up to
+                    # LOG_BATCH_SIZE entries rather than one event per line
+                    parsed_lines = [parse_log_line(line.strip()) for line in new_lines if line.strip()]
+                    for start in range(0, len(parsed_lines), LOG_BATCH_SIZE):
+                        batch = parsed_lines[start:start + LOG_BATCH_SIZE]
+                        yield f"data: {_JSON_ENCODER.encode(batch)}\n\n"
+                    
+                    # Poll rather than block a worker thread on a file watch for the
+                    # life of every open stream
+                    await asyncio.sleep(0.5)  # Check every 500ms
+                except Exception as e:
+                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
+                    await asyncio.sleep(1)
+        finally:
+            log_handle.close()
     
     return StreamingResponse(log_generator(), media_type="text/event-stream")
 
@@ -473,6 +654,7 @@ async def stream_logs():
 async def clear_logs():
     """Clear the log file"""
     log_file = get_log_file_path()
+    _path_cache.clear()
     
     try:
         if log_file.exists():
@@ -500,28 +682,28 @@ async def get_plex_logs_directory_info():
             }
         })
     
-    log_files = get_plex_log_files()
+    log_files = get_plex_log_file_stats()
     return {
         "found": True,
         "directory": str(logs_dir),
         "log_files_count": len(log_files),
-        "log_files": [{"name": f.name, "size": f.stat().st_size, "modified": f.stat().st_mtime} for f in log_files[:10]]
+        "log_files": [{"name": f.name, "size": st.st_size, "modified": st.st_mtime} for f, st in log_files[:10]]
     }
 
 
 @router.get("/plex/logs/files")
 async def list_plex_log_files():
     """List available Plex log files"""
-    log_files = get_plex_log_files()
+    log_files = get_plex_log_file_stats()
     return {
         "files": [
             {
                 "name": f.name,
                 "path": str(f),
-                "size": f.stat().st_size,
-                "modified": datetime.fromtimestamp(f.stat().st_mtime).isoformat()
+                "size": st.st_size,
+                "modified": datetime.fromtimestamp(st.st_mtime).isoformat()
             }
-            for f in log_files
+            for f, st in log_files
         ]
     }
 
@@ -563,23 +745,23 @@ async def get_plex_log_entries(
     
     try:
         entries = []
-        with open(target_file, 'r', encoding='utf-8', errors='ignore') as f:
-            # Read last N lines
-            all_lines = f.readlines()
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
+        # Read last N lines (off the event loop; logs can sit on slow disks)
+        level_token = _level_token(filter_level)
+        for line in await asyncio.to_thread(tail_raw_lines, target_file, lines):
+            # Lines that cannot match the level filter are skipped before decoding
+            if level_token and level_token not in line:
+                continue
+            line = line.decode('utf-8', errors='ignore').strip()
+            if not line:
+                continue
+            
+            parsed = parse_plex_log_line(line)
             
-            for line in recent_lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                parsed = parse_plex_log_line(line)
-                
-                # Apply level filter
-                if filter_level and parsed["level"] != filter_level:
-                    continue
-                
-                entries.append(parsed)
+            # Apply level filter
+            if filter_level and parsed["level"] != filter_level:
+                continue
+            
+            entries.append(parsed)
         
         return {
             "entries": entries,
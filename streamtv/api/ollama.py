@@ -3,14 +3,19 @@ Ollama AI Troubleshooting API endpoints
 """
 
 from fastapi import APIRouter, Request, HTTPException
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from pathlib import Path
 import subprocess
+import asyncio
 import logging
 import json
 import os
+import functools
 import platform
+import re
+import shutil
 import sys
+import time
 from typing import Optional, Dict, List
 import tempfile
 import httpx
@@ -23,6 +28,18 @@ router = APIRouter(tags=["Ollama"])
 BASE_DIR = Path(__file__).parent.parent.parent
 SCRIPTS_DIR = BASE_DIR / "scripts"
 
+# Ollama server used for model listing and queries
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+
+# Log-context filters, matched against raw (undecoded) log lines
+_STREAMTV_ERROR_RE = re.compile(rb"error|exception|traceback", re.IGNORECASE)
+_STREAMTV_WARNING_RE = re.compile(rb"warning", re.IGNORECASE)
+# First level word on a Plex line, as found by parse_plex_log_line
+_PLEX_LEVEL_RE = re.compile(rb"\b(ERROR|WARN|WARNING|INFO|DEBUG|CRITICAL|FATAL)\b")
+
+# Shared keep-alive client for the Ollama server (created lazily, closed on shutdown)
+_ollama_client: Optional[httpx.AsyncClient] = None
+
 # Ollama model definitions
 OLLAMA_MODELS = {
     "llama3.2:3b": {
@@ -69,48 +86,79 @@ OLLAMA_MODELS = {
     }
 }
 
+# check_ollama_installed() result, reused for _OLLAMA_INSTALLED_TTL seconds
+_OLLAMA_INSTALLED_TTL = 30.0
+_ollama_installed_cache = {"value": False, "ts": None}
+
+# Free disk space changes slowly; avoid spawning df on every status poll
+_DISK_INFO_TTL = 10.0
+_disk_info_cache = {"value": {}, "ts": None}
+
 def check_ollama_installed() -> bool:
     """Check if Ollama is installed"""
-    try:
-        result = subprocess.run(
-            ["ollama", "--version"],
-            capture_output=True,
-            text=True,
-            timeout=5
+    now = time.monotonic()
+    ts = _ollama_installed_cache["ts"]
+    if ts is not None and now - ts < _OLLAMA_INSTALLED_TTL:
+        return _ollama_installed_cache["value"]
+    
+    # No binary on PATH means no need to spawn one
+    installed = False
+    if shutil.which("ollama"):
+        try:
+            result = subprocess.run(
+                ["ollama", "--version"],
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            installed = result.returncode == 0
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            pass
+    
+    _ollama_installed_cache["value"] = installed
+    _ollama_installed_cache["ts"] = now
+    return installed
+
+def _get_ollama_client() -> httpx.AsyncClient:
+    """Return the shared Ollama HTTP client, creating it if needed."""
+    global _ollama_client
+    if _ollama_client is None or _ollama_client.is_closed:
+        _ollama_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(120.0, connect=5.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
         )
-        return result.returncode == 0
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        return False
+    return _ollama_client
+
+
+async def close_ollama_client() -> None:
+    """Close the shared Ollama HTTP client (application shutdown)."""
+    global _ollama_client
+    if _ollama_client is not None:
+        await _ollama_client.aclose()
+        _ollama_client = None
+
 
-def get_installed_ollama_models() -> List[str]:
+async def get_installed_ollama_models() -> List[str]:
     """Get list of installed Ollama models"""
     if not check_ollama_installed():
         return []
     
+    # Ask the Ollama server directly rather than spawning `ollama list`
     try:
-        result = subprocess.run(
-            ["ollama", "list"],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        if result.returncode == 0:
-            models = []
-            lines = result.stdout.strip().split('\n')
-            for line in lines[1:]:  # Skip header
-                if line.strip():
-                    parts = line.split()
-                    if parts:
-                        model_name = parts[0]
-                        models.append(model_name)
-            return models
+        response = await _get_ollama_client().get(f"{OLLAMA_URL}/api/tags", timeout=5.0)
+        if response.status_code == 200:
+            return [model["name"] for model in response.json().get("models", [])]
+    except httpx.RequestError as e:
+        # Same as `ollama list` failing: the server is not running
+        logger.debug(f"Ollama server not reachable: {e}")
     except Exception as e:
         logger.error(f"Error getting Ollama models: {e}")
     
     return []
 
-def get_system_info() -> Dict:
-    """Get system information"""
+@functools.lru_cache(maxsize=1)
+def _static_system_info() -> Dict:
+    """Get hardware information that does not change while the process runs"""
     system = platform.system()
     info = {
         "system": system,
@@ -140,20 +188,6 @@ def get_system_info() -> Dict:
             )
             if result.returncode == 0:
                 info["cpu_cores"] = int(result.stdout.strip())
-            
-            # Get disk space
-            result = subprocess.run(
-                ["df", "-g", "."],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    parts = lines[1].split()
-                    if len(parts) >= 4:
-                        info["disk_free_gb"] = int(parts[3])
         except Exception as e:
             logger.warning(f"Could not get all system info: {e}")
     
@@ -176,20 +210,6 @@ def get_system_info() -> Dict:
             )
             if result.returncode == 0:
                 info["cpu_cores"] = int(result.stdout.strip())
-            
-            # Get disk space
-            result = subprocess.run(
-                ["df", "-BG", "."],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            if result.returncode == 0:
-                lines = result.stdout.strip().split('\n')
-                if len(lines) > 1:
-                    parts = lines[1].split()
-                    if len(parts) >= 4:
-                        info["disk_free_gb"] = int(parts[3].rstrip('G'))
         except Exception as e:
             logger.warning(f"Could not get all system info: {e}")
     
@@ -198,7 +218,6 @@ def get_system_info() -> Dict:
             import psutil
             info["ram_gb"] = psutil.virtual_memory().total / (1024 ** 3)
             info["cpu_cores"] = psutil.cpu_count()
-            info["disk_free_gb"] = psutil.disk_usage('.').free / (1024 ** 3)
         except ImportError:
             # Fallback without psutil
             try:
@@ -231,6 +250,49 @@ def get_system_info() -> Dict:
     
     return info
 
+def _dynamic_system_info() -> Dict:
+    """Get free disk space, re-measured at most every _DISK_INFO_TTL seconds"""
+    now = time.monotonic()
+    if _disk_info_cache["ts"] is not None and now - _disk_info_cache["ts"] < _DISK_INFO_TTL:
+        return _disk_info_cache["value"]
+    
+    system = platform.system()
+    info = {}
+    
+    if system in ("Darwin", "Linux"):
+        try:
+            # Get disk space
+            df_args = ["df", "-g", "."] if system == "Darwin" else ["df", "-BG", "."]
+            result = subprocess.run(
+                df_args,
+                capture_output=True,
+                text=True,
+                timeout=5
+            )
+            if result.returncode == 0:
+                lines = result.stdout.strip().split('\n')
+                if len(lines) > 1:
+                    parts = lines[1].split()
+                    if len(parts) >= 4:
+                        info["disk_free_gb"] = int(parts[3].rstrip('G'))
+        except Exception as e:
+            logger.warning(f"Could not get all system info: {e}")
+    
+    elif system == "Windows":
+        try:
+            import psutil
+            info["disk_free_gb"] = psutil.disk_usage('.').free / (1024 ** 3)
+        except ImportError:
+            pass
+    
+    _disk_info_cache["value"] = info
+    _disk_info_cache["ts"] = now
+    return info
+
+def get_system_info() -> Dict:
+    """Get system information"""
+    return {**_static_system_info(), **_dynamic_system_info()}
+
 def get_recommended_models(system_info: Optional[Dict] = None) -> List[Dict]:
     """Get recommended Ollama models based on system hardware"""
     if system_info is None:
@@ -268,7 +330,7 @@ async def get_ollama_status():
     installed = check_ollama_installed()
     system_info = get_system_info()
     recommended_models = get_recommended_models(system_info)
-    installed_models = get_installed_ollama_models() if installed else []
+    installed_models = await get_installed_ollama_models() if installed else []
     
     return {
         "installed": installed,
@@ -403,6 +465,9 @@ async def install_ollama():
             "message": f"Installation failed: {str(e)}",
             "installed": False
         }
+    finally:
+        # Re-check on the next call instead of serving a cached "not installed"
+        _ollama_installed_cache["ts"] = None
 
 @router.post("/ollama/models/{model_id}/install")
 async def install_ollama_model(model_id: str):
@@ -487,7 +552,7 @@ async def ollama_page(request: Request):
 def get_streamtv_logs_context(max_lines: int = 200) -> str:
     """Get recent StreamTV logs as context for AI troubleshooting"""
     from ..config import config
-    from ..api.logs import get_log_file_path
+    from ..api.logs import get_log_file_path, tail_raw_lines
     
     try:
         log_file = get_log_file_path()
@@ -495,19 +560,16 @@ def get_streamtv_logs_context(max_lines: int = 200) -> str:
             return "No StreamTV log file found."
         
         # Read last N lines
-        with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-            recent_lines = lines[-max_lines:] if len(lines) > max_lines else lines
+        recent_lines = tail_raw_lines(log_file, max_lines)
         
-        # Filter for errors and warnings
+        # Filter for errors and warnings, decoding only the lines kept
         error_lines = []
         warning_lines = []
         for line in recent_lines:
-            line_lower = line.lower()
-            if 'error' in line_lower or 'exception' in line_lower or 'traceback' in line_lower:
-                error_lines.append(line.strip())
-            elif 'warning' in line_lower:
-                warning_lines.append(line.strip())
+            if _STREAMTV_ERROR_RE.search(line):
+                error_lines.append(line.decode('utf-8', errors='ignore').strip())
+            elif _STREAMTV_WARNING_RE.search(line):
+                warning_lines.append(line.decode('utf-8', errors='ignore').strip())
         
         # Combine, prioritizing errors
         context_lines = error_lines[-50:] + warning_lines[-30:]  # Last 50 errors, 30 warnings
@@ -523,7 +585,7 @@ def get_streamtv_logs_context(max_lines: int = 200) -> str:
 
 def get_plex_logs_context(max_lines: int = 200) -> str:
     """Get recent Plex logs as context for AI troubleshooting"""
-    from ..api.logs import get_plex_logs_directory, get_plex_log_files, parse_plex_log_line
+    from ..api.logs import get_plex_logs_directory, get_plex_log_files, tail_raw_lines
     
     try:
         logs_dir = get_plex_logs_directory()
@@ -537,20 +599,20 @@ def get_plex_logs_context(max_lines: int = 200) -> str:
         # Read from most recent log file
         target_file = log_files[0]
         
-        with open(target_file, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-            recent_lines = lines[-max_lines:] if len(lines) > max_lines else lines
+        recent_lines = tail_raw_lines(target_file, max_lines)
         
-        # Filter for errors and warnings
+        # Classify on the level token alone; full parsing is not needed to filter
         error_lines = []
         warning_lines = []
         for line in recent_lines:
-            parsed = parse_plex_log_line(line.strip())
-            level = parsed.get('level', '').upper()
-            if level in ['ERROR', 'FATAL', 'CRITICAL']:
-                error_lines.append(line.strip())
-            elif level == 'WARN':
-                warning_lines.append(line.strip())
+            level_match = _PLEX_LEVEL_RE.search(line)
+            if not level_match:
+                continue
+            level = level_match.group(1)
+            if level in (b'ERROR', b'FATAL', b'CRITICAL'):
+                error_lines.append(line.decode('utf-8', errors='ignore').strip())
+            elif level in (b'WARN', b'WARNING'):
+                warning_lines.append(line.decode('utf-8', errors='ignore').strip())
         
         # Combine, prioritizing errors
         context_lines = error_lines[-50:] + warning_lines[-30:]
@@ -610,6 +672,18 @@ Always be specific, actionable, and reference official documentation when approp
     return system_prompt
 
 
+async def _relay_ollama_stream(response: httpx.Response):
+    """Forward Ollama's NDJSON generate stream line by line, closing the upstream when done."""
+    try:
+        async for line in response.aiter_lines():
+            if line:
+                yield line + "\n"
+    except httpx.RequestError as e:
+        logger.error(f"Ollama stream interrupted: {e}")
+    finally:
+        await response.aclose()
+
+
 @router.post("/ollama/query")
 async def query_ollama(request: Request):
     """Query Ollama AI with context from StreamTV and Plex logs"""
@@ -625,6 +699,9 @@ async def query_ollama(request: Request):
     include_streamtv_logs = body.get("include_streamtv_logs", True)
     include_plex_logs = body.get("include_plex_logs", True)
     max_log_lines = int(body.get("max_log_lines", 200))
+    stream = body.get("stream", False)
+    if isinstance(stream, str):
+        stream = stream.lower() in ("1", "true", "yes")
     
     if not query:
         raise HTTPException(status_code=400, detail="Query parameter is required")
@@ -633,7 +710,7 @@ async def query_ollama(request: Request):
         raise HTTPException(status_code=400, detail="Ollama is not installed. Please install Ollama first.")
     
     # Get installed models
-    installed_models = get_installed_ollama_models()
+    installed_models = await get_installed_ollama_models()
     if not installed_models:
         raise HTTPException(status_code=400, detail="No Ollama models installed. Please install a model first.")
     
@@ -650,15 +727,13 @@ async def query_ollama(request: Request):
         # Add system prompt with Python docs
         context_parts.append(build_ai_system_prompt())
         
-        # Add StreamTV logs if requested
+        # Read the requested StreamTV/Plex logs concurrently, off the event loop
+        log_tasks = []
         if include_streamtv_logs:
-            streamtv_context = get_streamtv_logs_context(max_log_lines)
-            context_parts.append(streamtv_context)
-        
-        # Add Plex logs if requested
+            log_tasks.append(asyncio.to_thread(get_streamtv_logs_context, max_log_lines))
         if include_plex_logs:
-            plex_context = get_plex_logs_context(max_log_lines)
-            context_parts.append(plex_context)
+            log_tasks.append(asyncio.to_thread(get_plex_logs_context, max_log_lines))
+        context_parts.extend(await asyncio.gather(*log_tasks))
         
         # Combine context
         full_context = "\n\n".join(context_parts)
@@ -675,40 +750,52 @@ Please analyze the logs and provide a detailed answer with:
 4. Relevant Python documentation references if applicable
 """
         
-        # Call Ollama API
-        ollama_url = os.getenv("OLLAMA_URL", "http://localhost:11434")
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": bool(stream),
+            "options": {
+                "temperature": 0.7,
+                "top_p": 0.9,
+            }
+        }
+        client = _get_ollama_client()
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{ollama_url}/api/generate",
-                json={
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.7,
-                        "top_p": 0.9,
-                    }
-                }
+        if stream:
+            # Relay tokens as Ollama produces them (NDJSON, one object per line)
+            response = await client.send(
+                client.build_request("POST", f"{OLLAMA_URL}/api/generate", json=payload),
+                stream=True
             )
-            
             if response.status_code != 200:
+                await response.aread()
+                await response.aclose()
                 raise HTTPException(
                     status_code=500,
                     detail=f"Ollama API error: {response.status_code} - {response.text}"
                 )
-            
-            result = response.json()
-            return {
-                "success": True,
-                "model": model,
-                "response": result.get("response", ""),
-                "context_used": {
-                    "streamtv_logs": include_streamtv_logs,
-                    "plex_logs": include_plex_logs,
-                    "log_lines_analyzed": max_log_lines
-                }
+            return StreamingResponse(_relay_ollama_stream(response), media_type="application/x-ndjson")
+        
+        # Call Ollama API
+        response = await client.post(f"{OLLAMA_URL}/api/generate", json=payload)
+        
+        if response.status_code != 200:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Ollama API error: {response.status_code} - {response.text}"
+            )
+        
+        result = response.json()
+        return {
+            "success": True,
+            "model": model,
+            "response": result.get("response", ""),
+            "context_used": {
+                "streamtv_logs": include_streamtv_logs,
+                "plex_logs": include_plex_logs,
+                "log_lines_analyzed": max_log_lines
             }
+        }
     
     except httpx.TimeoutException:
         raise HTTPException(status_code=500, detail="Ollama request timed out. The model may be too slow or the query too complex.")
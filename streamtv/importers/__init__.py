@@ -1,6 +1,6 @@
 """Importers for creating channels and content from YAML files"""
 
-from .channel_importer import import_channels_from_yaml, ChannelImporter
+from .channel_importer import import_channels_from_yaml, import_channels_from_data, ChannelImporter
 
-__all__ = ["import_channels_from_yaml", "ChannelImporter"]
+__all__ = ["import_channels_from_yaml", "import_channels_from_data", "ChannelImporter"]
 
@@ -352,6 +352,19 @@ class ChannelImporter:
         with open(yaml_path, 'r') as f:
             data = yaml.safe_load(f)
         
+        return await self.import_from_data(data, yaml_path.name)
+    
+    async def import_from_data(self, data: Dict[str, Any], source_name: str) -> List[Channel]:
+        """
+        Import channels from already-parsed YAML data
+        
+        Args:
+            data: Parsed YAML document
+            source_name: Name used in log messages (usually the file name)
+        
+        Returns:
+            List of imported Channel objects
+        """
         # Initialize database
         init_db()
         
@@ -359,7 +372,7 @@ class ChannelImporter:
         if not channels_config:
             raise ValueError("YAML file must contain a 'channels' list")
         
-        logger.info(f"Importing {len(channels_config)} channels from {yaml_path.name}...")
+        logger.info(f"Importing {len(channels_config)} channels from {source_name}...")
         
         imported_channels = []
         for channel_config in channels_config:
@@ -401,3 +414,22 @@ async def import_channels_from_yaml(yaml_path: Path, validate: bool = True) -> L
     finally:
         importer.close()
 
+
+async def import_channels_from_data(data: Dict[str, Any], source_name: str) -> List[Channel]:
+    """
+    Convenience function to import channels from already-parsed YAML data
+    
+    Callers are responsible for any schema validation beforehand.
+    
+    Args:
+        data: Parsed YAML document
+        source_name: Name used in log messages (usually the file name)
+    
+    Returns:
+        List of imported Channel objects
+    """
+    importer = ChannelImporter()
+    try:
+        return await importer.import_from_data(data, source_name)
+    finally:
+        importer.close()
@@ -17,7 +17,8 @@ from slowapi.errors import RateLimitExceeded
 from .config import config
 from .database import init_db, get_db
 from .api import api_router, iptv_router_instance, docs_router, logs_router
-from .api.ollama import router as ollama_router
+from .api.ollama import router as ollama_router, close_ollama_client
+from .api.iptv import close_probe_client
 from .hdhomerun import hdhomerun_router, SSDPServer
 from .utils.logging_setup import setup_logging, log_system_info
 
@@ -94,6 +95,8 @@ async def lifespan(app: FastAPI):
         logger.info("Stopped all continuous channel streams")
     if ssdp_server:
         ssdp_server.stop()
+    await close_probe_client()
+    await close_ollama_client()
 
 
 # Create FastAPI app
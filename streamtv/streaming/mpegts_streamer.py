@@ -7,7 +7,6 @@ import shutil
 from typing import AsyncIterator, Optional, List, Dict, Any
 from pathlib import Path
 import json
-from datetime import datetime
 
 from streamtv.config import config
 from streamtv.database import Channel, MediaItem
@@ -17,26 +16,6 @@ from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
-# #region agent log
-DEBUG_LOG_PATH = "/Users/roto1231/Documents/XCode Projects/StreamTV/.cursor/debug.log"
-def _debug_log(location: str, message: str, data: dict, hypothesis_id: str):
-    """Write debug log entry"""
-    try:
-        with open(DEBUG_LOG_PATH, "a") as f:
-            log_entry = {
-                "sessionId": "debug-session",
-                "runId": "run1",
-                "hypothesisId": hypothesis_id,
-                "location": location,
-                "message": message,
-                "data": data,
-                "timestamp": int(datetime.now().timestamp() * 1000)
-            }
-            f.write(json.dumps(log_entry) + "\n")
-    except Exception:
-        pass
-# #endregion
-
 
 class MPEGTSStreamer:
     """Streams videos as continuous MPEG-TS using FFmpeg"""
@@ -356,7 +335,6 @@ class MPEGTSStreamer:
             stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=15.0)
             
             if process.returncode == 0 and stdout:
-                import json
                 probe_data = json.loads(stdout.decode())
                 
                 codec_info = {
@@ -413,15 +391,6 @@ class MPEGTSStreamer:
         # Build FFmpeg command (with smart codec detection)
         ffmpeg_cmd = self._build_ffmpeg_command(stream_url, codec_info, source=source)
         
-        # #region agent log
-        _debug_log("mpegts_streamer.py:_transcode_to_mpegts:before_start", "Starting FFmpeg", {
-            "stream_url_has_token": 'X-Plex-Token' in stream_url if stream_url else False,
-            "stream_url_base": stream_url.split('?')[0][:100] if stream_url else None,
-            "cmd_length": len(ffmpeg_cmd),
-            "is_plex_url": '/library/metadata/' in stream_url if stream_url else False
-        }, "B")
-        # #endregion
-        
         logger.debug(f"FFmpeg command: {' '.join(ffmpeg_cmd)}")
         
         # Start FFmpeg process
@@ -434,12 +403,6 @@ class MPEGTSStreamer:
                 stderr=asyncio.subprocess.PIPE
             )
             
-            # #region agent log
-            _debug_log("mpegts_streamer.py:_transcode_to_mpegts:process_created", "FFmpeg process created", {
-                "pid": process.pid if process else None
-            }, "B")
-            # #endregion
-            
             # Check for cancellation immediately after creating subprocess (catch late cancellations)
             try:
                 await asyncio.sleep(0)
@@ -468,18 +431,6 @@ class MPEGTSStreamer:
                         line_str = line.decode().strip()
                         stderr_lines.append(line_str)
                         
-                        # #region agent log
-                        if '401' in line_str or 'Unauthorized' in line_str or '403' in line_str:
-                            _debug_log("mpegts_streamer.py:_transcode_to_mpegts:auth_error", "FFmpeg auth error detected", {
-                                "error_line": line_str[:200],
-                                "line_number": len(stderr_lines)
-                            }, "D")
-                        if 'error opening input' in line_str.lower() or 'error=8' in line_str:
-                            _debug_log("mpegts_streamer.py:_transcode_to_mpegts:input_error", "FFmpeg input error", {
-                                "error_line": line_str[:200],
-                                "line_number": len(stderr_lines)
-                            }, "B")
-                        # #endregion
                         # Log errors and warnings
                         # Downgrade expected hardware acceleration errors for unsupported codecs to warnings
                         if 'failed setup for format videotoolbox' in line_str.lower() or \
@@ -524,15 +475,6 @@ class MPEGTSStreamer:
                 await stderr_task
                 error_msg = '\n'.join(stderr_lines[-10:])  # Last 10 lines
                 
-                # #region agent log
-                _debug_log("mpegts_streamer.py:_transcode_to_mpegts:immediate_failure", "FFmpeg failed immediately", {
-                    "exit_code": process.returncode,
-                    "error_msg": error_msg[:500],
-                    "stderr_line_count": len(stderr_lines),
-                    "stream_url_has_token": 'X-Plex-Token' in stream_url if stream_url else False
-                }, "B")
-                # #endregion
-                
                 raise RuntimeError(f"FFmpeg failed immediately (exit code {process.returncode}): {error_msg}")
             
             # Stream output in chunks
@@ -643,15 +585,6 @@ class MPEGTSStreamer:
     
     def _build_ffmpeg_command(self, input_url: str, codec_info: Optional[Dict[str, Any]] = None, source: Optional['StreamSource'] = None) -> List[str]:
         """Build FFmpeg command for MPEG-TS transcoding with smart codec selection"""
-        # #region agent log
-        _debug_log("mpegts_streamer.py:_build_ffmpeg_command:entry", "Building FFmpeg command", {
-            "input_url_has_token": 'X-Plex-Token' in input_url if input_url else False,
-            "input_url_base": input_url.split('?')[0][:100] if input_url else None,
-            "is_plex": '/library/metadata/' in input_url if input_url else False,
-            "url_length": len(input_url) if input_url else 0,
-            "has_profile": self._ffmpeg_profile is not None
-        }, "B")
-        # #endregion
         
         # Use profile-based builder if profile is available
         if self._ffmpeg_profile:
@@ -815,16 +748,6 @@ class MPEGTSStreamer:
         # Check if this is a DRM-protected HLS stream (common with PBS live streams)
         is_drm_hls = '.m3u8' in input_url.lower() and ('drm' in input_url.lower() or 'lls.pbs.org' in input_url.lower())
         
-        # #region agent log
-        _debug_log("mpegts_streamer.py:_build_ffmpeg_command:before_input", "Before adding input URL to FFmpeg", {
-            "input_url_has_token": 'X-Plex-Token' in input_url if input_url else False,
-            "input_url_length": len(input_url) if input_url else 0,
-            "is_plex": '/library/metadata/' in input_url if input_url else False,
-            "is_mpeg4": is_mpeg4,
-            "is_drm_hls": is_drm_hls
-        }, "B")
-        # #endregion
-        
         # Use more lenient settings for MPEG-4/AVI files (often have timing issues)
         if is_mpeg4:
             cmd.extend([
@@ -837,12 +760,6 @@ class MPEGTSStreamer:
                 "-i", input_url,
             ])
             
-            # #region agent log
-            _debug_log("mpegts_streamer.py:_build_ffmpeg_command:input_added", "Input URL added to FFmpeg command", {
-                "cmd_has_url": input_url in cmd,
-                "url_position": cmd.index(input_url) if input_url in cmd else -1
-            }, "B")
-            # #endregion
             logger.debug("Using lenient input settings for MPEG-4/AVI")
         elif is_drm_hls:
             # DRM-protected HLS streams may have decoding errors - be more resilient
@@ -857,12 +774,6 @@ class MPEGTSStreamer:
             ])
             logger.debug("Using error-resilient settings for DRM-protected HLS stream")
             
-            # #region agent log
-            _debug_log("mpegts_streamer.py:_build_ffmpeg_command:input_added_drm", "Input URL added (DRM HLS)", {
-                "cmd_has_url": input_url in cmd,
-                "url_position": cmd.index(input_url) if input_url in cmd else -1
-            }, "B")
-            # #endregion
         else:
             cmd.extend([
                 "-fflags", "+genpts+discardcorrupt+fastseek",  # Generate PTS, discard corrupt, fast seek
@@ -873,13 +784,6 @@ class MPEGTSStreamer:
                 "-i", input_url,
             ])
             
-            # #region agent log
-            _debug_log("mpegts_streamer.py:_build_ffmpeg_command:input_added_standard", "Input URL added (standard)", {
-                "cmd_has_url": input_url in cmd,
-                "url_position": cmd.index(input_url) if input_url in cmd else -1
-            }, "B")
-            # #endregion
-        
         # Output options (come AFTER -i)
         # Threads (applies to encoding) - only if transcoding
         if config.ffmpeg.threads > 0 and not (can_copy_video and can_copy_audio):
@@ -5,31 +5,9 @@ from typing import Optional, Dict, Any, AsyncIterator
 import logging
 import re
 from urllib.parse import urlparse
-import json
-from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-# #region agent log
-DEBUG_LOG_PATH = "/Users/roto1231/Documents/XCode Projects/StreamTV/.cursor/debug.log"
-def _debug_log(location: str, message: str, data: dict, hypothesis_id: str):
-    """Write debug log entry"""
-    try:
-        with open(DEBUG_LOG_PATH, "a") as f:
-            log_entry = {
-                "sessionId": "debug-session",
-                "runId": "run1",
-                "hypothesisId": hypothesis_id,
-                "location": location,
-                "message": message,
-                "data": data,
-                "timestamp": int(datetime.now().timestamp() * 1000)
-            }
-            f.write(json.dumps(log_entry) + "\n")
-    except Exception:
-        pass
-# #endregion
-
 
 class PlexAdapter:
     """Adapter for streaming Plex media without downloading"""
@@ -89,18 +67,8 @@ class PlexAdapter:
     
     def _add_token_to_url(self, stream_url: str) -> str:
         """Add X-Plex-Token query parameter to URL for FFmpeg compatibility"""
-        # #region agent log
-        _debug_log("plex_adapter.py:_add_token_to_url:entry", "Adding token to URL", {
-            "has_token": bool(self.token),
-            "token_length": len(self.token) if self.token else 0,
-            "stream_url_base": stream_url.split('?')[0] if '?' in stream_url else stream_url
-        }, "A")
-        # #endregion
         
         if not self.token:
-            # #region agent log
-            _debug_log("plex_adapter.py:_add_token_to_url:error", "Token missing", {}, "A")
-            # #endregion
             raise ValueError("Plex token is required for streaming. Please configure it in settings.")
         
         from urllib.parse import urlparse, urlencode, parse_qs, quote
@@ -114,30 +82,12 @@ class PlexAdapter:
         clean_token = self.token.strip().rstrip('.')
         query_params['X-Plex-Token'] = clean_token
         
-        # #region agent log
-        _debug_log("plex_adapter.py:_add_token_to_url:before_encode", "Before URL encoding", {
-            "has_existing_params": len(query_params) > 1,
-            "token_added": 'X-Plex-Token' in query_params,
-            "clean_token_length": len(clean_token)
-        }, "A")
-        # #endregion
-        
         # Rebuild URL with token - urlencode handles dict with string values correctly
         new_query = urlencode(query_params, doseq=False)
         # Ensure path is properly encoded if it contains special characters
         encoded_path = quote(parsed.path, safe='/')
         final_url = f"{parsed.scheme}://{parsed.netloc}{encoded_path}?{new_query}"
         
-        # #region agent log
-        _debug_log("plex_adapter.py:_add_token_to_url:exit", "URL constructed", {
-            "final_url_has_token": 'X-Plex-Token' in final_url,
-            "url_length": len(final_url),
-            "scheme": parsed.scheme,
-            "netloc": parsed.netloc,
-            "path_length": len(encoded_path)
-        }, "A")
-        # #endregion
-        
         logger.debug(f"Constructed Plex stream URL (base): {parsed.scheme}://{parsed.netloc}{encoded_path}")  # Log without token
         return final_url
     
@@ -159,43 +109,18 @@ class PlexAdapter:
         
         rating_key = self.extract_rating_key(url)
         if not rating_key:
-            # #region agent log
-            _debug_log("plex_adapter.py:get_stream_url:error", "Rating key extraction failed", {"url": url[:100]}, "C")
-            # #endregion
             raise ValueError(f"Could not extract rating key from URL: {url}")
         
-        # #region agent log
-        _debug_log("plex_adapter.py:get_stream_url:entry", "Getting stream URL", {
-            "rating_key": rating_key,
-            "base_url": self.base_url,
-            "has_token": bool(self.token)
-        }, "C")
-        # #endregion
-        
         # Get media info to find the best stream
         try:
             media_url = f"{self.base_url}/library/metadata/{rating_key}"
             response = await self._client.get(media_url, headers=self._get_headers())
             response.raise_for_status()
             
-            # #region agent log
-            _debug_log("plex_adapter.py:get_stream_url:after_request", "Plex API response received", {
-                "status_code": response.status_code,
-                "response_length": len(response.text)
-            }, "C")
-            # #endregion
-            
             # Parse XML response to get media parts
             import xml.etree.ElementTree as ET
             root = ET.fromstring(response.text)
             
-            # #region agent log
-            _debug_log("plex_adapter.py:get_stream_url:after_parse", "XML parsed", {
-                "root_tag": root.tag,
-                "root_children": [c.tag for c in root][:5]
-            }, "C")
-            # #endregion
-            
             # Find the first Media element with a Part
             # Try multiple XPath patterns to find the Part
             media_elem = root.find('.//Media')
@@ -203,26 +128,12 @@ class PlexAdapter:
                 # Try alternative: might be directly under Video
                 media_elem = root.find('.//Video/Media')
             
-            # #region agent log
-            _debug_log("plex_adapter.py:get_stream_url:media_elem", "Media element search", {
-                "media_elem_found": media_elem is not None,
-                "media_elem_tag": media_elem.tag if media_elem is not None else None
-            }, "C")
-            # #endregion
-            
             if media_elem is not None:
                 # Try to find Part element - could be direct child or nested
                 part_elem = media_elem.find('Part')
                 if part_elem is None:
                     part_elem = media_elem.find('.//Part')
                 
-                # #region agent log
-                _debug_log("plex_adapter.py:get_stream_url:part_elem", "Part element search", {
-                    "part_elem_found": part_elem is not None,
-                    "part_key": part_elem.get('key')[:80] if part_elem is not None and part_elem.get('key') else None
-                }, "C")
-                # #endregion
-                
                 if part_elem is not None:
                     stream_url = part_elem.get('key')
                     if stream_url:
@@ -238,49 +149,21 @@ class PlexAdapter:
                             # Relative path - prepend base URL
                             full_url = f"{self.base_url}/{stream_url.lstrip('/')}"
             
-                        # #region agent log
-                        _debug_log("plex_adapter.py:get_stream_url:before_token", "Before adding token", {
-                            "full_url_base": full_url.split('?')[0],
-                            "stream_url_type": "relative" if stream_url.startswith('/') else "absolute"
-                        }, "B")
-                        # #endregion
-                        
                         logger.debug(f"Using Part key for streaming: {stream_url[:80]}...")
                         # Add authentication token for FFmpeg
                         result_url = self._add_token_to_url(full_url)
                         
-                        # #region agent log
-                        _debug_log("plex_adapter.py:get_stream_url:success", "Stream URL generated", {
-                            "result_url_has_token": 'X-Plex-Token' in result_url,
-                            "result_url_length": len(result_url)
-                        }, "B")
-                        # #endregion
-                        
                         return result_url
                 else:
                     logger.warning(f"No Part element found in Media for rating_key {rating_key}. XML structure: {ET.tostring(media_elem)[:200]}")
-                    # #region agent log
-                    _debug_log("plex_adapter.py:get_stream_url:no_part", "No Part element found", {
-                        "media_elem_children": [c.tag for c in media_elem][:10]
-                    }, "C")
-                    # #endregion
             else:
                 logger.warning(f"No Media element found for rating_key {rating_key}. Root tag: {root.tag}, children: {[c.tag for c in root][:5]}")
-                # #region agent log
-                _debug_log("plex_adapter.py:get_stream_url:no_media", "No Media element found", {}, "C")
-                # #endregion
             
             # Fallback: try using the rating key with /file endpoint
             # Note: /file endpoint may not work for all Plex setups, but it's worth trying
             logger.debug(f"Falling back to /file endpoint for rating_key {rating_key}")
             fallback_url = f"{self.base_url}/library/metadata/{rating_key}/file"
             
-            # #region agent log
-            _debug_log("plex_adapter.py:get_stream_url:fallback", "Using fallback URL", {
-                "fallback_url_base": fallback_url
-            }, "D")
-            # #endregion
-            
             return self._add_token_to_url(fallback_url)
             
         except Exception as e:
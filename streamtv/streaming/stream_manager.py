@@ -4,8 +4,6 @@ import httpx
 from typing import Optional, AsyncIterator
 import logging
 from enum import Enum
-import json
-from datetime import datetime
 
 from .youtube_adapter import YouTubeAdapter
 from .archive_org_adapter import ArchiveOrgAdapter
@@ -16,26 +14,6 @@ from ..utils.macos_credentials import get_credentials_from_keychain
 
 logger = logging.getLogger(__name__)
 
-# #region agent log
-DEBUG_LOG_PATH = "/Users/roto1231/Documents/XCode Projects/StreamTV/.cursor/debug.log"
-def _debug_log(location: str, message: str, data: dict, hypothesis_id: str):
-    """Write debug log entry"""
-    try:
-        with open(DEBUG_LOG_PATH, "a") as f:
-            log_entry = {
-                "sessionId": "debug-session",
-                "runId": "run1",
-                "hypothesisId": hypothesis_id,
-                "location": location,
-                "message": message,
-                "data": data,
-                "timestamp": int(datetime.now().timestamp() * 1000)
-            }
-            f.write(json.dumps(log_entry) + "\n")
-    except Exception:
-        pass
-# #endregion
-
 
 class StreamSource(Enum):
     YOUTUBE = "youtube"
@@ -129,67 +107,27 @@ class StreamManager:
     
     async def get_stream_url(self, url: str, source: Optional[StreamSource] = None, channel_name: Optional[str] = None) -> str:
         """Get streaming URL for a media URL"""
-        # #region agent log
-        _debug_log("stream_manager.py:get_stream_url:entry", "Getting stream URL", {
-            "url_base": url.split('?')[0][:100] if url else None,
-            "is_plex": '/library/metadata/' in url if url else False,
-            "has_plex_adapter": self.plex_adapter is not None
-        }, "D")
-        # #endregion
         
         if source is None:
             source = self.detect_source(url)
         
-        # #region agent log
-        _debug_log("stream_manager.py:get_stream_url:source_detected", "Source detected", {
-            "source": source.name if source else None
-        }, "D")
-        # #endregion
-        
         if source == StreamSource.YOUTUBE and self.youtube_adapter:
             result = await self.youtube_adapter.get_stream_url(url)
-            # #region agent log
-            _debug_log("stream_manager.py:get_stream_url:youtube", "YouTube URL generated", {
-                "result_length": len(result) if result else 0
-            }, "D")
-            # #endregion
             return result
         elif source == StreamSource.ARCHIVE_ORG and self.archive_org_adapter:
             identifier = self.archive_org_adapter.extract_identifier(url)
             if identifier:
                 filename = self.archive_org_adapter.extract_filename(url)
                 result = await self.archive_org_adapter.get_stream_url(identifier, filename)
-                # #region agent log
-                _debug_log("stream_manager.py:get_stream_url:archive", "Archive.org URL generated", {
-                    "result_length": len(result) if result else 0
-                }, "D")
-                # #endregion
                 return result
         elif source == StreamSource.PBS and self.pbs_adapter:
             # Pass channel name to help PBS adapter select correct stream from window.previews
             result = await self.pbs_adapter.get_stream_url(url, channel_name=channel_name)
-            # #region agent log
-            _debug_log("stream_manager.py:get_stream_url:pbs", "PBS URL generated", {
-                "result_length": len(result) if result else 0
-            }, "D")
-            # #endregion
             return result
         elif source == StreamSource.PLEX and self.plex_adapter:
             result = await self.plex_adapter.get_stream_url(url)
-            # #region agent log
-            _debug_log("stream_manager.py:get_stream_url:plex", "Plex URL generated", {
-                "result_has_token": 'X-Plex-Token' in result if result else False,
-                "result_length": len(result) if result else 0,
-                "result_base": result.split('?')[0][:100] if result else None
-            }, "D")
-            # #endregion
             return result
         
-        # #region agent log
-        _debug_log("stream_manager.py:get_stream_url:error", "Unsupported source", {
-            "source": source.name if source else None
-        }, "D")
-        # #endregion
         raise ValueError(f"Unsupported source or URL: {url}")
     
     async def get_media_info(self, url: str, source: Optional[StreamSource] = None) -> dict:
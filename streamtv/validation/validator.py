@@ -63,6 +63,29 @@ class YAMLValidator:
         
         return self._validate_file(file_path, self.schemas['channel'], 'channel')
     
+    def validate_channel_yaml_data(self, yaml_data: Any, source_name: str) -> Dict[str, Any]:
+        """
+        Validate already-parsed channel YAML data
+        
+        Same checks and error messages as validate_channel_file, for callers
+        that have already loaded the document and want to avoid re-reading it.
+        
+        Returns:
+            Dict with 'valid' (bool) and 'errors' (list) keys
+            
+        Raises:
+            ValidationError: If validation fails
+        """
+        if 'channel' not in self.schemas:
+            raise ValidationError("Channel schema not loaded")
+        
+        try:
+            return self._validate_yaml_data(yaml_data, self.schemas['channel'], 'channel', source_name)
+        except ValidationError:
+            raise
+        except Exception as e:
+            raise ValidationError(f"Unexpected error validating {source_name}: {str(e)}")
+    
     def validate_schedule_file(self, file_path: Path) -> Dict[str, Any]:
         """
         Validate a schedule YAML file
@@ -91,34 +114,7 @@ class YAMLValidator:
             if yaml_data is None:
                 raise ValidationError(f"Empty or invalid YAML file: {file_path}")
             
-            # Convert Python date objects to strings for validation (YAML parser converts dates)
-            yaml_data = self._normalize_data(yaml_data)
-            
-            # Validate against schema
-            errors = []
-            validator = Draft7Validator(schema)
-            
-            for error in validator.iter_errors(yaml_data):
-                error_path = " -> ".join(str(p) for p in error.path)
-                error_msg = f"{error_path}: {error.message}"
-                # Add more context for pattern validation errors
-                if "pattern" in error.message.lower() or "did not match" in error.message.lower():
-                    # Include the actual value that failed
-                    if error.instance is not None:
-                        error_msg = f"{error_path}: {error.message} (value: '{error.instance}')"
-                errors.append(error_msg)
-                logger.debug(f"Validation error: {error_msg}")
-            
-            if errors:
-                error_message = f"Validation failed for {file_path.name} ({schema_type}):\n" + "\n".join(f"  - {e}" for e in errors)
-                raise ValidationError(error_message, errors)
-            
-            logger.info(f"✓ Validated {file_path.name} ({schema_type})")
-            return {
-                'valid': True,
-                'errors': [],
-                'data': yaml_data
-            }
+            return self._validate_yaml_data(yaml_data, schema, schema_type, file_path.name)
             
         except yaml.YAMLError as e:
             raise ValidationError(f"YAML parsing error in {file_path.name}: {str(e)}")
@@ -127,6 +123,40 @@ class YAMLValidator:
         except Exception as e:
             raise ValidationError(f"Unexpected error validating {file_path.name}: {str(e)}")
     
+    def _validate_yaml_data(self, yaml_data: Any, schema: Dict[str, Any], schema_type: str, source_name: str) -> Dict[str, Any]:
+        """Validate parsed YAML data against a schema"""
+        if yaml_data is None:
+            raise ValidationError(f"Empty or invalid YAML file: {source_name}")
+        
+        # Convert Python date objects to strings for validation (YAML parser converts dates)
+        yaml_data = self._normalize_data(yaml_data)
+        
+        # Validate against schema
+        errors = []
+        validator = Draft7Validator(schema)
+        
+        for error in validator.iter_errors(yaml_data):
+            error_path = " -> ".join(str(p) for p in error.path)
+            error_msg = f"{error_path}: {error.message}"
+            # Add more context for pattern validation errors
+            if "pattern" in error.message.lower() or "did not match" in error.message.lower():
+                # Include the actual value that failed
+                if error.instance is not None:
+                    error_msg = f"{error_path}: {error.message} (value: '{error.instance}')"
+            errors.append(error_msg)
+            logger.debug(f"Validation error: {error_msg}")
+        
+        if errors:
+            error_message = f"Validation failed for {source_name} ({schema_type}):\n" + "\n".join(f"  - {e}" for e in errors)
+            raise ValidationError(error_message, errors)
+        
+        logger.info(f"✓ Validated {source_name} ({schema_type})")
+        return {
+            'valid': True,
+            'errors': [],
+            'data': yaml_data
+        }
+    
     def _normalize_data(self, data: Any) -> Any:
         """Normalize YAML data for JSON schema validation (convert dates, etc.)"""
         from datetime import date, datetime